@@ -0,0 +1,122 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Literal, TypeVar
+
+V = TypeVar("V")
+
+CacheState = Literal["fresh", "stale", "negative", "miss"]
+
+
+@dataclass
+class CacheEntry(Generic[V]):
+    stored_at: float
+    value: V | None = None
+    error: Exception | None = None
+    fallback: V | None = None
+    fresh_ttl: float | None = None
+    stale_ttl: float | None = None
+
+    @property
+    def last_known(self) -> V | None:
+        return self.value if self.value is not None else self.fallback
+
+
+class QuoteCache(Generic[V]):
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        fresh_ttl_seconds: float = 8,
+        stale_ttl_seconds: float = 60,
+        negative_ttl_seconds: float = 20,
+    ) -> None:
+        self._max_entries = max(1, max_entries)
+        self._fresh_ttl = fresh_ttl_seconds
+        self._stale_ttl = stale_ttl_seconds
+        self._negative_ttl = negative_ttl_seconds
+        self._entries: OrderedDict[str, CacheEntry[V]] = OrderedDict()
+        self._hits = 0
+        self._stale_hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: str) -> tuple[CacheState, CacheEntry[V] | None]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return "miss", None
+
+        age = time.monotonic() - entry.stored_at
+        fresh_ttl = self._fresh_ttl_of(entry)
+        if entry.error is not None:
+            if age < self._negative_ttl:
+                self._negative_hits += 1
+                self._entries.move_to_end(key)
+                return "negative", entry
+        elif age < fresh_ttl:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return "fresh", entry
+        elif age < fresh_ttl + self._stale_ttl_of(entry):
+            self._stale_hits += 1
+            self._entries.move_to_end(key)
+            return "stale", entry
+
+        self._misses += 1
+        return "miss", None
+
+    def put(self, key: str, value: V, fresh_ttl_seconds: float | None = None) -> None:
+        self._store(key, CacheEntry(stored_at=time.monotonic(), value=value, fresh_ttl=fresh_ttl_seconds))
+
+    def put_error(self, key: str, error: Exception) -> None:
+        existing = self._entries.get(key)
+        if existing is not None and existing.error is None:
+            age = time.monotonic() - existing.stored_at
+            if age < self._fresh_ttl_of(existing) + self._stale_ttl_of(existing):
+                return
+        fallback = existing.last_known if existing is not None else None
+        self._store(key, CacheEntry(stored_at=time.monotonic(), error=error, fallback=fallback))
+
+    def restore(self, key: str, value: V, stale_ttl_seconds: float) -> bool:
+        if key in self._entries:
+            return False
+        self._store(
+            key,
+            CacheEntry(stored_at=time.monotonic(), value=value, fresh_ttl=0.0, stale_ttl=stale_ttl_seconds),
+        )
+        return True
+
+    def export(self) -> list[tuple[str, V]]:
+        return [(key, entry.last_known) for key, entry in self._entries.items() if entry.last_known is not None]
+
+    def last_known(self, key: str) -> V | None:
+        entry = self._entries.get(key)
+        return entry.last_known if entry is not None else None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self._hits,
+            "stale_hits": self._stale_hits,
+            "negative_hits": self._negative_hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+        }
+
+    def _fresh_ttl_of(self, entry: CacheEntry[V]) -> float:
+        return self._fresh_ttl if entry.fresh_ttl is None else entry.fresh_ttl
+
+    def _stale_ttl_of(self, entry: CacheEntry[V]) -> float:
+        return self._stale_ttl if entry.stale_ttl is None else entry.stale_ttl
+
+    def _store(self, key: str, entry: CacheEntry[V]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
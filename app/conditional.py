@@ -0,0 +1,27 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = {item.strip().removeprefix("W/") for item in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def derive_etag(etag: str, *parts: object) -> str:
+    digest = hashlib.blake2b(f"{etag}|{parts!r}".encode("utf-8"), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Response | None:
+    headers = cache_headers(etag)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,244 @@
+import asyncio
+import math
+import mmap
+import re
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.persistence import FileLock
+from app.providers import RawQuote
+from app.trading_calendar import parse_quote_time
+
+RECORD = struct.Struct("<qff")
+SAFE_CODE = re.compile(r"^[A-Za-z0-9._-]{1,32}$")
+
+
+@dataclass
+class HistoryRecord:
+    timestamp: int
+    price: float
+    change_percent: float | None
+
+
+class QuoteHistoryStore:
+    def __init__(
+        self,
+        root: Path,
+        flush_interval_seconds: float = 5.0,
+        max_buffered_records: int = 20000,
+        write_lock: FileLock | None = None,
+    ) -> None:
+        self._root = root
+        self._write_lock = write_lock
+        self._flush_interval = flush_interval_seconds
+        self._max_buffered = max_buffered_records
+        self._buffer: dict[tuple[str, str], list[tuple[int, float, float]]] = {}
+        self._buffered_records = 0
+        self._last_timestamp: dict[tuple[str, str], int] = {}
+        self._flush_task: asyncio.Task[None] | None = None
+        self._pending_flushes: set[asyncio.Task[None]] = set()
+        self._flush_lock = asyncio.Lock()
+        self._written_records = 0
+
+    def start(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if self._pending_flushes:
+            await asyncio.gather(*self._pending_flushes, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "buffered_records": self._buffered_records,
+            "written_records": self._written_records,
+            "series": len(self._last_timestamp),
+        }
+
+    def record(self, asset_type: str, quote: RawQuote) -> None:
+        if quote.stale or not SAFE_CODE.match(quote.code):
+            return
+        quoted_at = parse_quote_time(quote.quote_time)
+        timestamp = int(quoted_at.timestamp()) if quoted_at else int(time.time())
+        key = (asset_type, quote.code)
+        if timestamp <= self._last_timestamp.get(key, 0):
+            return
+
+        self._last_timestamp[key] = timestamp
+        change = quote.change_percent if quote.change_percent is not None else math.nan
+        self._buffer.setdefault(key, []).append((timestamp, quote.price, change))
+        self._buffered_records += 1
+        if (
+            self._buffered_records >= self._max_buffered
+            and self._flush_task is not None
+            and not self._pending_flushes
+        ):
+            task = asyncio.ensure_future(self.flush())
+            self._pending_flushes.add(task)
+            task.add_done_callback(self._pending_flushes.discard)
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, {}
+            self._buffered_records = 0
+            self._written_records += await asyncio.to_thread(self._write_locked, batch)
+
+    async def query(
+        self, asset_type: str, code: str, start: int, end: int, interval_seconds: int
+    ) -> list[HistoryRecord]:
+        if not SAFE_CODE.match(code):
+            return []
+        await self.flush()
+        path = self._series_path(asset_type, code)
+        return await asyncio.to_thread(self._read_range, path, start, end, interval_seconds)
+
+    async def boundaries(
+        self, series: list[tuple[str, str]], start: int, end: int
+    ) -> dict[tuple[str, str], tuple[HistoryRecord, HistoryRecord]]:
+        await self.flush()
+        return await asyncio.to_thread(self._read_boundaries, series, start, end)
+
+    async def replay(
+        self, series: list[tuple[str, str]], windows: list[tuple[int, int, int]]
+    ) -> list[tuple[int, tuple[str, str], float]]:
+        await self.flush()
+        return await asyncio.to_thread(self._read_replay, series, windows)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    def _series_path(self, asset_type: str, code: str) -> Path:
+        return self._root / asset_type / f"{code}.bin"
+
+    def _write_locked(self, batch: dict[tuple[str, str], list[tuple[int, float, float]]]) -> int:
+        if self._write_lock is None:
+            return self._write_batch(batch)
+        with self._write_lock.hold_blocking():
+            return self._write_batch(batch)
+
+    def _write_batch(self, batch: dict[tuple[str, str], list[tuple[int, float, float]]]) -> int:
+        written = 0
+        for (asset_type, code), rows in batch.items():
+            path = self._series_path(asset_type, code)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            last_on_disk = self._read_last_timestamp(path)
+            payload = bytearray()
+            for timestamp, price, change in rows:
+                if timestamp <= last_on_disk:
+                    continue
+                payload += RECORD.pack(timestamp, price, change)
+                last_on_disk = timestamp
+                written += 1
+            if payload:
+                with path.open("ab") as file:
+                    file.write(payload)
+        return written
+
+    def _read_last_timestamp(self, path: Path) -> int:
+        try:
+            with path.open("rb") as file:
+                size = file.seek(0, 2)
+                usable = size - size % RECORD.size
+                if usable == 0:
+                    return 0
+                file.seek(usable - RECORD.size)
+                return RECORD.unpack(file.read(RECORD.size))[0]
+        except FileNotFoundError:
+            return 0
+
+    def _read_range(self, path: Path, start: int, end: int, interval_seconds: int) -> list[HistoryRecord]:
+        try:
+            file = path.open("rb")
+        except FileNotFoundError:
+            return []
+
+        with file:
+            size = file.seek(0, 2)
+            count = size // RECORD.size
+            if count == 0:
+                return []
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                first = self._bisect(view, count, start)
+                last = self._bisect(view, count, end + 1)
+                buckets: dict[int, HistoryRecord] = {}
+                for timestamp, price, change in RECORD.iter_unpack(
+                    view[first * RECORD.size : last * RECORD.size]
+                ):
+                    buckets[timestamp - timestamp % interval_seconds] = HistoryRecord(
+                        timestamp=timestamp,
+                        price=price,
+                        change_percent=None if math.isnan(change) else change,
+                    )
+        return list(buckets.values())
+
+    def _read_boundaries(
+        self, series: list[tuple[str, str]], start: int, end: int
+    ) -> dict[tuple[str, str], tuple[HistoryRecord, HistoryRecord]]:
+        results: dict[tuple[str, str], tuple[HistoryRecord, HistoryRecord]] = {}
+        for asset_type, code in series:
+            if not SAFE_CODE.match(code):
+                continue
+            try:
+                file = self._series_path(asset_type, code).open("rb")
+            except FileNotFoundError:
+                continue
+            with file:
+                count = file.seek(0, 2) // RECORD.size
+                if count == 0:
+                    continue
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    first = self._bisect(view, count, start)
+                    last = self._bisect(view, count, end + 1) - 1
+                    if first > last:
+                        continue
+                    results[(asset_type, code)] = (
+                        self._unpack(view, first),
+                        self._unpack(view, last),
+                    )
+        return results
+
+    def _read_replay(
+        self, series: list[tuple[str, str]], windows: list[tuple[int, int, int]]
+    ) -> list[tuple[int, tuple[str, str], float]]:
+        events: list[tuple[int, tuple[str, str], float]] = []
+        for asset_type, code in series:
+            if not SAFE_CODE.match(code):
+                continue
+            path = self._series_path(asset_type, code)
+            for start, end, interval_seconds in windows:
+                events.extend(
+                    (record.timestamp, (asset_type, code), record.price)
+                    for record in self._read_range(path, start, end, interval_seconds)
+                )
+        events.sort(key=lambda event: event[0])
+        return events
+
+    def _unpack(self, view: mmap.mmap, index: int) -> HistoryRecord:
+        timestamp, price, change = RECORD.unpack_from(view, index * RECORD.size)
+        return HistoryRecord(
+            timestamp=timestamp, price=price, change_percent=None if math.isnan(change) else change
+        )
+
+    def _bisect(self, view: mmap.mmap, count: int, timestamp: int) -> int:
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if RECORD.unpack_from(view, middle * RECORD.size)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
@@ -1,38 +1,211 @@
+import asyncio
 import os
+import signal
+import threading
+from collections.abc import Callable
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Literal
 
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from app.compression import CompressionMiddleware
+from app.conditional import cache_headers, conditional_response, derive_etag
+from app.history import QuoteHistoryStore
+from app.metrics import REGISTRY, SNAPSHOT_PHASE_SECONDS, EventLoopLagMonitor, stats_samples
+from app.multiworker import ConfigWatcher, SharedQuoteStore
+from app.paging import MAX_PAGE_SIZE, PositionRows, page_rows
+from app.persistence import FileLock, lock_path_for
+from app.portfolios import PortfolioRegistry
 from app.providers import QuoteProvider
+from app.refresher import SnapshotRefresher
 from app.schemas import (
     AssetType,
     FundImportRequest,
     FundImportResponse,
+    PortfolioAggregateSnapshot,
+    PortfolioConfig,
+    PortfolioCreateResponse,
+    PortfolioListResponse,
+    PositionBatchRequest,
+    PositionBatchResponse,
     PositionDeleteResponse,
     PositionMutationResponse,
     PositionUpdateRequest,
     PositionUpsertRequest,
+    PortfolioHistoryResponse,
     PortfolioSnapshot,
+    QuoteHistoryResponse,
+    SnapshotPage,
 )
 from app.service import PortfolioService
+from app.statements import StatementReader, load_statement_schemas, resolve_statement_schema
+from app.streaming import (
+    UploadStreamingResponse,
+    stream_fund_import,
+    stream_snapshots,
+    stream_statement_import,
+)
+from app.transport import TransportConfig, parse_upstream_overrides
+from app.warmstart import WarmStartStore
+from app.trading_calendar import QuoteExpiryPolicy, TradingCalendar, market_now
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 TEMPLATE_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
 DEFAULT_CONFIG = BASE_DIR / "data" / "portfolio.json"
 CONFIG_PATH = Path(os.getenv("PORTFOLIO_FILE", str(DEFAULT_CONFIG)))
+PORTFOLIO_DIR = Path(os.getenv("PORTFOLIO_DIR", str(BASE_DIR / "data" / "portfolios")))
+PORTFOLIO_IDLE_SECONDS = float(os.getenv("PORTFOLIO_IDLE_SECONDS", "600"))
+HOLIDAYS_FILE = Path(os.getenv("TRADING_HOLIDAYS_FILE", str(BASE_DIR / "data" / "trading_holidays.json")))
+WARM_START_FILE = os.getenv("WARM_START_FILE", str(BASE_DIR / "data" / "warm_start.json.gz"))
+WARM_START_INTERVAL_SECONDS = float(os.getenv("WARM_START_INTERVAL_SECONDS", "60"))
+HISTORY_DIR = Path(os.getenv("QUOTE_HISTORY_DIR", str(BASE_DIR / "data" / "history")))
+VALUATION_ENGINE = "numpy" if os.getenv("VALUATION_ENGINE", "python").lower() == "numpy" else "python"
+UPSTREAM_OVERRIDES = parse_upstream_overrides(os.getenv("QUOTE_UPSTREAM_OVERRIDES", ""))
+FAST_JSON = os.getenv("FAST_JSON", "0").lower() in ("1", "true", "yes")
+BACKGROUND_REFRESH = os.getenv("BACKGROUND_REFRESH", "0").lower() in ("1", "true", "yes")
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+MULTI_WORKER = os.getenv("MULTI_WORKER", "0").lower() in ("1", "true", "yes")
+SHARED_STATE_DIR = Path(os.getenv("SHARED_STATE_DIR", str(BASE_DIR / "data" / "shared")))
+CONFIG_WATCH_INTERVAL_SECONDS = float(os.getenv("CONFIG_WATCH_INTERVAL_SECONDS", "1"))
+STATEMENT_SCHEMAS_FILE = Path(
+    os.getenv("STATEMENT_SCHEMAS_FILE", str(BASE_DIR / "data" / "statement_schemas.json"))
+)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PROVIDER_COUNTERS = (
+    "upstream_fetches",
+    "coalesced_requests",
+    "background_refreshes",
+    "last_known_fallbacks",
+    "cache_hits",
+    "cache_stale_hits",
+    "cache_negative_hits",
+    "cache_misses",
+    "cache_evictions",
+)
+
+
+def on_shutdown_signal(callback: Callable[[], None]) -> Callable[[], None]:
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+    loop = asyncio.get_running_loop()
+    previous = {
+        sig: handler
+        for sig in (signal.SIGINT, signal.SIGTERM)
+        if callable(handler := signal.getsignal(sig))
+    }
+
+    def handle(sig: int, frame) -> None:
+        loop.call_soon_threadsafe(callback)
+        previous[sig](sig, frame)
+
+    for sig in previous:
+        signal.signal(sig, handle)
+
+    def restore() -> None:
+        for sig, handler in previous.items():
+            if signal.getsignal(sig) is handle:
+                signal.signal(sig, handler)
+
+    return restore
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    provider = QuoteProvider()
-    app.state.portfolio_service = PortfolioService(CONFIG_PATH, provider)
+    calendar = TradingCalendar.from_file(HOLIDAYS_FILE)
+    shared_quotes = None
+    if MULTI_WORKER:
+        shared_quotes = SharedQuoteStore(SHARED_STATE_DIR / "quote_cache.sqlite3")
+        shared_quotes.open()
+    provider = QuoteProvider(
+        transport_config=TransportConfig(upstream_overrides=UPSTREAM_OVERRIDES),
+        expiry_policy=QuoteExpiryPolicy(calendar),
+        shared_cache=shared_quotes,
+    )
+    history_store = QuoteHistoryStore(
+        HISTORY_DIR, write_lock=FileLock(SHARED_STATE_DIR / "history.lock") if MULTI_WORKER else None
+    )
+    history_store.start()
+    provider.add_quote_listener(history_store.record, include_shared=False)
+
+    def create_service(path: Path) -> PortfolioService:
+        return PortfolioService(
+            path,
+            provider,
+            history_store=history_store,
+            valuation_engine=VALUATION_ENGINE,
+            file_lock=FileLock(lock_path_for(path)) if MULTI_WORKER else None,
+        )
+
+    service = create_service(CONFIG_PATH)
+    app.state.portfolio_service = service
+    warm_start = None
+    if WARM_START_FILE:
+        warm_start = WarmStartStore(Path(WARM_START_FILE), provider, service, WARM_START_INTERVAL_SECONDS)
+        await warm_start.restore()
+        warm_start.start()
+    app.state.fast_json = FAST_JSON
+    app.state.statement_schemas = load_statement_schemas(STATEMENT_SCHEMAS_FILE)
+    registry = PortfolioRegistry(
+        PORTFOLIO_DIR, create_service, default_service=service, idle_seconds=PORTFOLIO_IDLE_SECONDS
+    )
+    registry.start()
+    app.state.portfolio_registry = registry
+    refresher = SnapshotRefresher(service, calendar=calendar)
+    app.state.snapshot_refresher = refresher
+    if BACKGROUND_REFRESH:
+        refresher.start()
+    service.add_save_listener(refresher.wake)
+    restore_signals = on_shutdown_signal(refresher.close)
+    config_watcher = None
+    if MULTI_WORKER:
+        config_watcher = ConfigWatcher(service, refresher.wake, CONFIG_WATCH_INTERVAL_SECONDS)
+        config_watcher.start()
+    loop_monitor = EventLoopLagMonitor(LOOP_LAG_INTERVAL_SECONDS)
+    loop_monitor.start()
+
+    def collect_runtime_metrics():
+        yield from stats_samples("quote_provider", {"": provider.stats()}, counters=PROVIDER_COUNTERS)
+        yield from stats_samples(
+            "quote_transport", provider.transport_stats(), "host", ("requests", "queued_requests")
+        )
+        yield from stats_samples(
+            "quote_source", provider.source_stats(), "source", ("successes", "failures", "short_circuits")
+        )
+        yield from stats_samples("portfolio_registry", {"": registry.stats()}, counters=("loads", "evictions"))
+        yield from stats_samples("quote_history", {"": history_store.stats()}, counters=("written_records",))
+        yield from loop_monitor.collect()
+        if warm_start:
+            yield from stats_samples("warm_start", {"": warm_start.stats()}, counters=("saves",))
+        if shared_quotes:
+            yield from stats_samples(
+                "shared_quote_cache",
+                {"": shared_quotes.stats()},
+                counters=("hits", "claims", "waits", "publishes"),
+            )
+
+    REGISTRY.add_collector(collect_runtime_metrics)
     yield
+    restore_signals()
+    REGISTRY.remove_collector(collect_runtime_metrics)
+    await loop_monitor.close()
+    if config_watcher:
+        await config_watcher.close()
+    service.remove_save_listener(refresher.wake)
+    await refresher.stop()
+    if warm_start:
+        await warm_start.close()
+    await registry.close()
+    await service.close()
+    await history_store.close()
     await provider.close()
+    if shared_quotes:
+        shared_quotes.close()
 
 
 app = FastAPI(
@@ -42,6 +215,8 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
 templates = Jinja2Templates(directory=str(TEMPLATE_DIR))
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
@@ -59,16 +234,153 @@ async def index(request: Request):
     )
 
 
-@app.get("/api/portfolio", response_model=PortfolioSnapshot)
-async def portfolio(request: Request):
+async def current_snapshot(request: Request) -> PortfolioSnapshot:
+    snapshot = request.app.state.snapshot_refresher.latest()
+    if snapshot:
+        return snapshot
     return await request.app.state.portfolio_service.get_snapshot()
 
 
+def snapshot_response(
+    request: Request, response: Response, service: PortfolioService, snapshot: PortfolioSnapshot
+):
+    etag = service.snapshot_etag(snapshot)
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+    if request.app.state.fast_json:
+        return Response(
+            service.snapshot_json(snapshot), media_type="application/json", headers=cache_headers(etag)
+        )
+    return snapshot
+
+
+def page_response(request: Request, page: SnapshotPage, etag: str):
+    if request.app.state.fast_json:
+        with SNAPSHOT_PHASE_SECONDS.time("serialization"):
+            body = page.model_dump_json()
+        return Response(body, media_type="application/json", headers=cache_headers(etag))
+    return page
+
+
+@app.get("/api/portfolio", response_model=PortfolioSnapshot)
+async def portfolio(request: Request, response: Response):
+    snapshot = await current_snapshot(request)
+    return snapshot_response(request, response, request.app.state.portfolio_service, snapshot)
+
+
+def snapshot_page_params(
+    sort: str | None = None,
+    asset_type: AssetType | None = None,
+    status: Literal["ok", "error"] | None = None,
+    code_prefix: str | None = Query(default=None, max_length=20),
+    cursor: str | None = Query(default=None, max_length=512),
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    fields: str | None = None,
+) -> dict:
+    return {
+        "sort": sort,
+        "asset_type": asset_type,
+        "status": status,
+        "code_prefix": code_prefix,
+        "cursor": cursor,
+        "limit": limit,
+        "fields": fields,
+    }
+
+
+@app.get("/api/portfolio/positions", response_model=SnapshotPage)
+async def portfolio_positions(
+    request: Request, response: Response, params: dict = Depends(snapshot_page_params)
+):
+    service = request.app.state.portfolio_service
+    snapshot = request.app.state.snapshot_refresher.latest()
+    if snapshot:
+        rows, etag = PositionRows.from_snapshot(snapshot), service.snapshot_etag(snapshot)
+    else:
+        rows, etag = await service.get_position_rows()
+    return positions_page_response(request, response, rows, etag, params)
+
+
+def positions_page_response(
+    request: Request, response: Response, rows: PositionRows, snapshot_etag: str, params: dict
+):
+    etag = derive_etag(snapshot_etag, sorted(params.items()))
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
+    try:
+        return page_response(request, page_rows(rows, **params), etag)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+
+
+@app.get("/api/portfolio/history", response_model=PortfolioHistoryResponse)
+async def portfolio_history(
+    request: Request,
+    start: datetime | None = Query(default=None, alias="from"),
+    end: datetime | None = Query(default=None, alias="to"),
+    resolution: Literal["auto", "minute", "hour", "day"] = "auto",
+):
+    end = end or market_now()
+    start = start or end - timedelta(days=1)
+    return await request.app.state.portfolio_service.get_portfolio_history(start, end, resolution)
+
+
+@app.get("/api/portfolio/stream")
+async def portfolio_stream(request: Request):
+    return StreamingResponse(
+        stream_snapshots(request.app.state.snapshot_refresher, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/portfolio/import-funds", response_model=FundImportResponse)
 async def import_funds(payload: FundImportRequest, request: Request):
     return await request.app.state.portfolio_service.import_fund_items(payload.items)
 
 
+@app.post("/api/portfolio/import-funds/stream")
+async def import_funds_stream(payload: FundImportRequest, request: Request):
+    return StreamingResponse(
+        stream_fund_import(request.app.state.portfolio_service, payload.items),
+        media_type="application/x-ndjson",
+    )
+
+
+async def statement_import_response(
+    service: PortfolioService,
+    request: Request,
+    schema: str,
+    delimiter: str | None,
+    encoding: str | None,
+) -> UploadStreamingResponse:
+    try:
+        reader = StatementReader(
+            request.stream(),
+            resolve_statement_schema(request.app.state.statement_schemas, schema, delimiter, encoding),
+        )
+        await reader.read_header()
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+    return UploadStreamingResponse(
+        stream_statement_import(service, reader), media_type="application/x-ndjson"
+    )
+
+
+@app.post("/api/portfolio/import-statement", response_class=UploadStreamingResponse)
+async def import_statement(
+    request: Request,
+    schema: str = "default",
+    delimiter: str | None = Query(default=None, max_length=3),
+    encoding: str | None = Query(default=None, max_length=20),
+):
+    return await statement_import_response(
+        request.app.state.portfolio_service, request, schema, delimiter, encoding
+    )
+
+
 @app.post("/api/positions", response_model=PositionMutationResponse)
 async def add_position(payload: PositionUpsertRequest, request: Request):
     try:
@@ -77,6 +389,11 @@ async def add_position(payload: PositionUpsertRequest, request: Request):
         raise HTTPException(status_code=400, detail=str(error)) from error
 
 
+@app.post("/api/positions/batch", response_model=PositionBatchResponse)
+async def batch_positions(payload: PositionBatchRequest, request: Request):
+    return await request.app.state.portfolio_service.apply_position_batch(payload.operations)
+
+
 @app.patch("/api/positions/{asset_type}/{code}", response_model=PositionMutationResponse)
 async def update_position(
     asset_type: AssetType, code: str, payload: PositionUpdateRequest, request: Request
@@ -97,6 +414,157 @@ async def delete_position(asset_type: AssetType, code: str, request: Request):
         raise HTTPException(status_code=404, detail=str(error)) from error
 
 
+@app.get("/api/history/{asset_type}/{code}", response_model=QuoteHistoryResponse)
+async def quote_history(
+    asset_type: AssetType,
+    code: str,
+    request: Request,
+    start: datetime | None = Query(default=None, alias="from"),
+    end: datetime | None = Query(default=None, alias="to"),
+    interval: int = Query(default=60, ge=1, le=86400),
+):
+    end = end or market_now()
+    start = start or end - timedelta(days=1)
+    try:
+        return await request.app.state.portfolio_service.get_quote_history(
+            asset_type, code, start, end, interval
+        )
+    except LookupError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+
+
+def portfolio_service(portfolio_id: str, request: Request) -> PortfolioService:
+    try:
+        return request.app.state.portfolio_registry.get(portfolio_id)
+    except LookupError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+
+
+@app.get("/api/portfolios", response_model=PortfolioListResponse)
+async def list_portfolios(request: Request):
+    return PortfolioListResponse(portfolios=request.app.state.portfolio_registry.ids())
+
+
+@app.get("/api/portfolios/aggregate", response_model=PortfolioAggregateSnapshot)
+async def aggregate_portfolios(request: Request):
+    return await request.app.state.portfolio_registry.get_aggregate_snapshot()
+
+
+@app.post("/api/portfolios/{portfolio_id}", response_model=PortfolioCreateResponse)
+async def create_portfolio(
+    portfolio_id: str, request: Request, payload: PortfolioConfig | None = None
+):
+    try:
+        await request.app.state.portfolio_registry.create(portfolio_id, payload or PortfolioConfig())
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+    return PortfolioCreateResponse(message="创建组合成功", id=portfolio_id)
+
+
+@app.get("/api/portfolios/{portfolio_id}", response_model=PortfolioSnapshot)
+async def named_portfolio(
+    request: Request, response: Response, service: PortfolioService = Depends(portfolio_service)
+):
+    snapshot = await service.get_snapshot()
+    return snapshot_response(request, response, service, snapshot)
+
+
+@app.get("/api/portfolios/{portfolio_id}/positions", response_model=SnapshotPage)
+async def named_portfolio_positions(
+    request: Request,
+    response: Response,
+    service: PortfolioService = Depends(portfolio_service),
+    params: dict = Depends(snapshot_page_params),
+):
+    rows, etag = await service.get_position_rows()
+    return positions_page_response(request, response, rows, etag, params)
+
+
+@app.get("/api/portfolios/{portfolio_id}/history", response_model=PortfolioHistoryResponse)
+async def named_portfolio_history(
+    service: PortfolioService = Depends(portfolio_service),
+    start: datetime | None = Query(default=None, alias="from"),
+    end: datetime | None = Query(default=None, alias="to"),
+    resolution: Literal["auto", "minute", "hour", "day"] = "auto",
+):
+    end = end or market_now()
+    start = start or end - timedelta(days=1)
+    return await service.get_portfolio_history(start, end, resolution)
+
+
+@app.post("/api/portfolios/{portfolio_id}/import-funds", response_model=FundImportResponse)
+async def named_import_funds(
+    payload: FundImportRequest, service: PortfolioService = Depends(portfolio_service)
+):
+    return await service.import_fund_items(payload.items)
+
+
+@app.post("/api/portfolios/{portfolio_id}/import-statement", response_class=UploadStreamingResponse)
+async def named_import_statement(
+    request: Request,
+    schema: str = "default",
+    delimiter: str | None = Query(default=None, max_length=3),
+    encoding: str | None = Query(default=None, max_length=20),
+    service: PortfolioService = Depends(portfolio_service),
+):
+    return await statement_import_response(service, request, schema, delimiter, encoding)
+
+
+@app.post("/api/portfolios/{portfolio_id}/positions", response_model=PositionMutationResponse)
+async def named_add_position(
+    payload: PositionUpsertRequest, service: PortfolioService = Depends(portfolio_service)
+):
+    try:
+        return await service.add_position(payload)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+
+
+@app.post("/api/portfolios/{portfolio_id}/positions/batch", response_model=PositionBatchResponse)
+async def named_batch_positions(
+    payload: PositionBatchRequest, service: PortfolioService = Depends(portfolio_service)
+):
+    return await service.apply_position_batch(payload.operations)
+
+
+@app.patch(
+    "/api/portfolios/{portfolio_id}/positions/{asset_type}/{code}",
+    response_model=PositionMutationResponse,
+)
+async def named_update_position(
+    asset_type: AssetType,
+    code: str,
+    payload: PositionUpdateRequest,
+    service: PortfolioService = Depends(portfolio_service),
+):
+    try:
+        return await service.update_position(asset_type, code, payload)
+    except LookupError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+
+
+@app.delete(
+    "/api/portfolios/{portfolio_id}/positions/{asset_type}/{code}",
+    response_model=PositionDeleteResponse,
+)
+async def named_delete_position(
+    asset_type: AssetType, code: str, service: PortfolioService = Depends(portfolio_service)
+):
+    try:
+        return await service.delete_position(asset_type, code)
+    except LookupError as error:
+        raise HTTPException(status_code=404, detail=str(error)) from error
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
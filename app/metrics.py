@@ -0,0 +1,205 @@
+import asyncio
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+Labels = tuple[str, ...]
+
+
+@dataclass
+class Sample:
+    name: str
+    kind: str
+    help: str
+    values: list[tuple[dict[str, str], float]] = field(default_factory=list)
+
+
+@dataclass
+class _Series:
+    buckets: list[int]
+    total: float = 0.0
+    count: int = 0
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, labels: Labels = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.bounds = tuple(sorted(buckets))
+        self._series: dict[Labels, _Series] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = _Series(buckets=[0] * (len(self.bounds) + 1))
+            self._series[label_values] = series
+        series.buckets[bisect_left(self.bounds, value)] += 1
+        series.total += value
+        series.count += 1
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, *label_values)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in sorted(self._series.items()):
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.bounds, math.inf), series.buckets):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                yield f"{self.name}_bucket{format_labels({**labels, 'le': le})} {cumulative}"
+            yield f"{self.name}_sum{format_labels(labels)} {series.total!r}"
+            yield f"{self.name}_count{format_labels(labels)} {series.count}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._histograms: list[Histogram] = []
+        self._collectors: list[Callable[[], Iterable[Sample]]] = []
+
+    def histogram(
+        self, name: str, help: str, labels: Labels = (), buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        histogram = Histogram(name, help, labels, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        for collector in self._collectors:
+            for sample in collector():
+                lines.append(f"# HELP {sample.name} {sample.help}")
+                lines.append(f"# TYPE {sample.name} {sample.kind}")
+                for labels, value in sample.values:
+                    lines.append(f"{sample.name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def stats_samples(
+    prefix: str,
+    stats_by_key: Mapping[str, Mapping[str, float | str]],
+    label: str | None = None,
+    counters: Collection[str] = (),
+) -> list[Sample]:
+    samples: dict[str, Sample] = {}
+    for key, stats in stats_by_key.items():
+        labels = {label: key} if label else {}
+        for field_name, value in stats.items():
+            sample_labels = labels
+            if isinstance(value, str):
+                name, kind = f"{prefix}_{field_name}", "gauge"
+                sample_labels, value = {**labels, field_name: value}, 1
+            elif field_name in counters:
+                name, kind = f"{prefix}_{field_name}_total", "counter"
+            else:
+                name, kind = f"{prefix}_{field_name}", "gauge"
+            sample = samples.setdefault(name, Sample(name, kind, f"{prefix}.{field_name}"))
+            sample.values.append((sample_labels, value))
+    return list(samples.values())
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{key}="{escape_label(str(value))}"' for key, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+UPSTREAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "quote_upstream_request_seconds", "单次上游行情请求耗时", ("source", "status")
+)
+CONFIG_LOCK_WAIT_SECONDS = REGISTRY.histogram(
+    "portfolio_config_lock_wait_seconds", "等待配置锁的时间", buckets=FAST_BUCKETS
+)
+CONFIG_LOCK_HOLD_SECONDS = REGISTRY.histogram(
+    "portfolio_config_lock_hold_seconds", "持有配置锁的时间", buckets=FAST_BUCKETS
+)
+CONFIG_LOAD_SECONDS = REGISTRY.histogram(
+    "portfolio_config_load_seconds", "load_config 耗时（含缓存命中）", ("result",), FAST_BUCKETS
+)
+CONFIG_SAVE_SECONDS = REGISTRY.histogram("portfolio_config_save_seconds", "save_config 耗时（含合并写入等待）")
+CONFIG_FLUSH_SECONDS = REGISTRY.histogram("portfolio_config_flush_seconds", "配置文件原子写入耗时")
+SNAPSHOT_PHASE_SECONDS = REGISTRY.histogram(
+    "portfolio_snapshot_phase_seconds", "组合快照各阶段耗时", ("phase",)
+)
+EVENT_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "event_loop_lag_seconds", "事件循环调度延迟", buckets=FAST_BUCKETS
+)
+
+
+class EventLoopLagMonitor:
+    def __init__(self, interval_seconds: float = 0.5) -> None:
+        self._interval = interval_seconds
+        self._task: asyncio.Task[None] | None = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def collect(self) -> Iterable[Sample]:
+        yield Sample("event_loop_lag_last_seconds", "gauge", "最近一次事件循环延迟", [({}, self.last_lag)])
+        yield Sample("event_loop_lag_max_seconds", "gauge", "事件循环最大延迟", [({}, self.max_lag)])
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self._interval
+            await asyncio.sleep(self._interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
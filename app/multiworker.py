@@ -0,0 +1,280 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from app.providers import (
+    DataProviderError,
+    QuoteBudgetExceededError,
+    RawQuote,
+    UpstreamUnavailableError,
+)
+from app.resilience import remaining_budget
+from app.service import PortfolioService
+
+SQLITE_BATCH = 500
+
+
+class SharedQuoteStore:
+    def __init__(
+        self,
+        path: Path,
+        lease_seconds: float = 10.0,
+        negative_ttl_seconds: float = 20.0,
+        poll_interval_seconds: float = 0.05,
+        retention_seconds: float = 3600.0,
+    ) -> None:
+        self._path = path
+        self._lease_seconds = lease_seconds
+        self._negative_ttl = negative_ttl_seconds
+        self._poll_interval = poll_interval_seconds
+        self._retention = retention_seconds
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._publishes = 0
+        self._hits = 0
+        self._claims = 0
+        self._waits = 0
+
+    def open(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=10, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS quotes "
+            "(key TEXT PRIMARY KEY, payload TEXT NOT NULL, fresh_until REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS leases "
+            "(key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection = connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            with self._lock:
+                self._connection.execute("DELETE FROM leases WHERE owner = ?", (self._owner,))
+                self._connection.close()
+            self._connection = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self._hits,
+            "claims": self._claims,
+            "waits": self._waits,
+            "publishes": self._publishes,
+        }
+
+    async def fetch(
+        self,
+        asset_type: str,
+        codes: list[str],
+        fetch_missing: Callable[[list[str]], Awaitable[dict[str, RawQuote | DataProviderError]]],
+        ttl_seconds: Callable[[str, RawQuote], float],
+    ) -> tuple[dict[str, RawQuote | DataProviderError], dict[str, float]]:
+        outcomes: dict[str, RawQuote | DataProviderError] = {}
+        shared_ttls: dict[str, float] = {}
+        pending = list(dict.fromkeys(codes))
+        while True:
+            hits = await asyncio.to_thread(self._read, asset_type, pending)
+            self._hits += len(hits)
+            for code, (outcome, remaining) in hits.items():
+                outcomes[code] = outcome
+                if isinstance(outcome, RawQuote):
+                    shared_ttls[code] = remaining
+            pending = [code for code in pending if code not in hits]
+            if not pending:
+                return outcomes, shared_ttls
+
+            claimed = await asyncio.to_thread(self._claim, asset_type, pending)
+            if claimed:
+                self._claims += len(claimed)
+                try:
+                    fetched = await fetch_missing(claimed)
+                except BaseException:
+                    self._release(asset_type, claimed)
+                    raise
+                rows = [
+                    (code, outcome, ttl_seconds(code, outcome) if isinstance(outcome, RawQuote) else None)
+                    for code, outcome in fetched.items()
+                ]
+                await asyncio.to_thread(self._publish, asset_type, rows, claimed)
+                outcomes.update(fetched)
+                pending = [code for code in pending if code not in fetched]
+                if not pending:
+                    return outcomes, shared_ttls
+
+            budget = remaining_budget()
+            if budget is not None and budget <= 0:
+                for code in pending:
+                    outcomes[code] = QuoteBudgetExceededError("等待其他进程拉取行情超时")
+                return outcomes, shared_ttls
+            self._waits += 1
+            await asyncio.sleep(self._poll_interval)
+
+    def _read(
+        self, asset_type: str, codes: list[str]
+    ) -> dict[str, tuple[RawQuote | DataProviderError, float]]:
+        now = time.time()
+        found: dict[str, tuple[RawQuote | DataProviderError, float]] = {}
+        prefix = len(asset_type) + 1
+        with self._lock:
+            for index in range(0, len(codes), SQLITE_BATCH):
+                keys = [f"{asset_type}:{code}" for code in codes[index : index + SQLITE_BATCH]]
+                rows = self._connection.execute(
+                    f"SELECT key, payload, fresh_until FROM quotes "
+                    f"WHERE key IN ({','.join('?' * len(keys))}) AND fresh_until > ?",
+                    (*keys, now),
+                ).fetchall()
+                for key, payload, fresh_until in rows:
+                    found[key[prefix:]] = (self._decode(key[prefix:], payload), fresh_until - now)
+        return found
+
+    def _claim(self, asset_type: str, codes: list[str]) -> list[str]:
+        now = time.time()
+        claimed: list[str] = []
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for index in range(0, len(codes), SQLITE_BATCH):
+                    keys = [f"{asset_type}:{code}" for code in codes[index : index + SQLITE_BATCH]]
+                    placeholders = ",".join("?" * len(keys))
+                    connection.execute(
+                        f"DELETE FROM leases WHERE key IN ({placeholders}) AND expires_at <= ?", (*keys, now)
+                    )
+                    fresh = {
+                        key
+                        for (key,) in connection.execute(
+                            f"SELECT key FROM quotes WHERE key IN ({placeholders}) AND fresh_until > ?",
+                            (*keys, now),
+                        )
+                    }
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                        [(key, self._owner, now + self._lease_seconds) for key in keys if key not in fresh],
+                    )
+                    rows = connection.execute(
+                        f"SELECT key FROM leases WHERE key IN ({placeholders}) AND owner = ?",
+                        (*keys, self._owner),
+                    ).fetchall()
+                    claimed.extend(key[len(asset_type) + 1 :] for (key,) in rows)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def _publish(
+        self,
+        asset_type: str,
+        rows: list[tuple[str, RawQuote | DataProviderError, float | None]],
+        claimed: list[str],
+    ) -> None:
+        now = time.time()
+        records = []
+        for code, outcome, ttl in rows:
+            if isinstance(outcome, QuoteBudgetExceededError):
+                continue
+            if isinstance(outcome, RawQuote):
+                payload = [
+                    outcome.name,
+                    outcome.price,
+                    outcome.change_percent,
+                    outcome.quote_time,
+                    outcome.source,
+                    outcome.code,
+                ]
+                fresh_until = now + ttl
+            else:
+                payload = {
+                    "error": str(outcome),
+                    "unavailable": isinstance(outcome, UpstreamUnavailableError),
+                }
+                fresh_until = now + self._negative_ttl
+            records.append((f"{asset_type}:{code}", json.dumps(payload, ensure_ascii=False), fresh_until))
+        self._publishes += 1
+        with self._lock:
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO quotes (key, payload, fresh_until) VALUES (?, ?, ?)", records
+                )
+                self._delete_leases(asset_type, claimed)
+                if self._publishes % 100 == 0:
+                    connection.execute("DELETE FROM quotes WHERE fresh_until < ?", (now - self._retention,))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def _release(self, asset_type: str, codes: list[str]) -> None:
+        with self._lock:
+            self._delete_leases(asset_type, codes)
+
+    def _delete_leases(self, asset_type: str, codes: list[str]) -> None:
+        for index in range(0, len(codes), SQLITE_BATCH):
+            keys = [f"{asset_type}:{code}" for code in codes[index : index + SQLITE_BATCH]]
+            self._connection.execute(
+                f"DELETE FROM leases WHERE key IN ({','.join('?' * len(keys))}) AND owner = ?",
+                (*keys, self._owner),
+            )
+
+    def _decode(self, code: str, payload: str) -> RawQuote | DataProviderError:
+        value = json.loads(payload)
+        if isinstance(value, dict):
+            error_type = UpstreamUnavailableError if value.get("unavailable") else DataProviderError
+            return error_type(value.get("error", ""))
+        name, price, change_percent, quote_time, source = value[:5]
+        return RawQuote(
+            code=value[5] if len(value) > 5 else code,
+            name=name,
+            price=price,
+            change_percent=change_percent,
+            quote_time=quote_time,
+            source=source,
+        )
+
+
+class ConfigWatcher:
+    def __init__(
+        self, service: PortfolioService, on_change: Callable[[], None], interval_seconds: float = 1.0
+    ) -> None:
+        self._service = service
+        self._on_change = on_change
+        self._interval = interval_seconds
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        version = self._service.config_version
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                self._service.load_config()
+            except (OSError, ValueError):
+                continue
+            if self._service.config_version != version:
+                version = self._service.config_version
+                self._on_change()
@@ -0,0 +1,151 @@
+import base64
+import binascii
+import heapq
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.schemas import PortfolioMeta, PortfolioSnapshot, PortfolioTotals, PositionQuote, SnapshotPage
+
+SORT_FIELDS = (
+    "pnl_percent",
+    "pnl_amount",
+    "market_value",
+    "cost_value",
+    "change_percent",
+    "current_price",
+    "units",
+    "code",
+    "name",
+)
+TEXT_SORT_FIELDS = ("code", "name")
+KEY_FIELDS = ("asset_type", "code")
+MAX_PAGE_SIZE = 1000
+
+SortKey = tuple[bool, Any, str, str]
+
+
+@dataclass
+class PositionRows:
+    meta: PortfolioMeta
+    totals: PortfolioTotals
+    count: int
+    column: Callable[[str], list[Any]]
+    rows: Callable[[list[int]], list[PositionQuote]]
+
+    @classmethod
+    def from_snapshot(cls, snapshot: PortfolioSnapshot) -> "PositionRows":
+        positions = snapshot.positions
+        return cls(
+            meta=snapshot.meta,
+            totals=snapshot.totals,
+            count=len(positions),
+            column=lambda field: [getattr(position, field) for position in positions],
+            rows=lambda indices: [positions[index] for index in indices],
+        )
+
+
+def parse_fields(value: str | None) -> set[str] | None:
+    if not value:
+        return None
+    fields = {field.strip() for field in value.split(",") if field.strip()}
+    unknown = fields - set(PositionQuote.model_fields)
+    if unknown:
+        raise ValueError(f"未知字段：{', '.join(sorted(unknown))}")
+    return fields | set(KEY_FIELDS)
+
+
+def parse_sort(value: str | None) -> tuple[str | None, bool]:
+    if not value:
+        return None, False
+    descending = value.startswith("-")
+    field = value.lstrip("+-")
+    if field not in SORT_FIELDS:
+        raise ValueError(f"不支持的排序字段：{field}")
+    return field, descending
+
+
+def encode_cursor(sort_field: str | None, descending: bool, key: SortKey) -> str:
+    order = f"{'-' if descending else ''}{sort_field or ''}"
+    payload = json.dumps([order, *key], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str | None, descending: bool) -> SortKey:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        order, flag, value, asset_type, code = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError) as error:
+        raise ValueError("分页游标无效") from error
+    if order != f"{'-' if descending else ''}{sort_field or ''}":
+        raise ValueError("分页游标与当前排序方式不一致")
+    if sort_field is None:
+        expected: type | tuple[type, ...] = int
+    elif sort_field in TEXT_SORT_FIELDS:
+        expected = str
+    else:
+        expected = (int, float)
+    missing = value is None
+    if (
+        not isinstance(flag, bool)
+        or missing != (flag != descending)
+        or (not missing and (isinstance(value, bool) or not isinstance(value, expected)))
+        or (sort_field is None and missing)
+    ):
+        raise ValueError("分页游标无效")
+    return flag, value, str(asset_type), str(code)
+
+
+def page_rows(
+    source: PositionRows,
+    sort: str | None = None,
+    asset_type: str | None = None,
+    status: str | None = None,
+    code_prefix: str | None = None,
+    cursor: str | None = None,
+    limit: int = 100,
+    fields: str | None = None,
+) -> SnapshotPage:
+    sort_field, descending = parse_sort(sort)
+    include = parse_fields(fields)
+    after = decode_cursor(cursor, sort_field, descending) if cursor else None
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    prefix = code_prefix.strip().lower() if code_prefix else ""
+
+    asset_types = source.column("asset_type")
+    codes = source.column("code")
+    statuses = source.column("status") if status else None
+    sort_values = source.column(sort_field) if sort_field else None
+    matched = [
+        index
+        for index in range(source.count)
+        if (not asset_type or asset_types[index] == asset_type)
+        and (statuses is None or statuses[index] == status)
+        and (not prefix or codes[index].lower().startswith(prefix))
+    ]
+
+    def sort_key(index: int) -> SortKey:
+        if sort_values is None:
+            return False, index, asset_types[index], codes[index]
+        value = sort_values[index]
+        missing = value is None
+        return (not missing if descending else missing), value, asset_types[index], codes[index]
+
+    candidates = matched
+    if after is not None:
+        candidates = [
+            index for index in matched if (sort_key(index) < after if descending else sort_key(index) > after)
+        ]
+    pick = heapq.nlargest if descending else heapq.nsmallest
+    selected = pick(limit + 1, candidates, key=sort_key)
+    has_more = len(selected) > limit
+    selected = selected[:limit]
+    return SnapshotPage(
+        meta=source.meta,
+        totals=source.totals,
+        matched=len(matched),
+        next_cursor=encode_cursor(sort_field, descending, sort_key(selected[-1])) if has_more else None,
+        positions=[position.model_dump(include=include) for position in source.rows(selected)],
+    )
+
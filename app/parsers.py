@@ -0,0 +1,95 @@
+import json
+from dataclasses import dataclass
+
+FUND_PREFIX = b"jsonpgz("
+TENCENT_PREFIX = b"v_"
+TENCENT_FIELDS = 31
+SYMBOL_DELIMITERS = b' \t\r\n;"'
+
+
+class PayloadFormatError(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class ParsedQuote:
+    raw_name: bytes | str | None
+    price: float | None
+    change_percent: float | None
+    quote_time: str | None
+
+    @property
+    def name(self) -> str | None:
+        if isinstance(self.raw_name, bytes):
+            self.raw_name = self.raw_name.decode("gbk", errors="ignore") or None
+        return self.raw_name
+
+
+def parse_fund_jsonp(body: bytes) -> ParsedQuote:
+    start = body.find(FUND_PREFIX)
+    end = body.rfind(b")")
+    if start < 0 or end < start + len(FUND_PREFIX):
+        raise PayloadFormatError("基金接口返回格式异常")
+    try:
+        payload = json.loads(body[start + len(FUND_PREFIX) : end])
+    except ValueError as error:
+        raise PayloadFormatError("基金接口返回格式异常") from error
+    if not isinstance(payload, dict):
+        raise PayloadFormatError("基金接口返回格式异常")
+
+    name = payload.get("name")
+    quote_time = payload.get("gztime")
+    return ParsedQuote(
+        raw_name=str(name) if name else None,
+        price=_as_float(payload.get("gsz")),
+        change_percent=_as_float(payload.get("gszzl")),
+        quote_time=str(quote_time) if quote_time else None,
+    )
+
+
+def index_tencent_payloads(body: bytes) -> dict[str, bytes]:
+    payloads: dict[str, bytes] = {}
+    position = body.find(TENCENT_PREFIX)
+    while position >= 0:
+        equals = body.find(b'="', position)
+        if equals < 0:
+            break
+        close = body.find(b'"', equals + 2)
+        if close < 0:
+            break
+        symbol = body[position + len(TENCENT_PREFIX) : equals].strip()
+        if symbol and len(symbol.translate(None, SYMBOL_DELIMITERS)) == len(symbol):
+            payloads[symbol.decode("ascii", errors="ignore").lower()] = body[equals + 2 : close]
+        position = body.find(TENCENT_PREFIX, close + 1)
+    return payloads
+
+
+def parse_tencent_payload(payload: bytes) -> ParsedQuote:
+    parts = payload.split(b"~", TENCENT_FIELDS)
+    if len(parts) < 5:
+        raise PayloadFormatError("股票接口返回字段不足")
+
+    current_price = _as_float(parts[3])
+    prev_close = _as_float(parts[4])
+    change_percent = None
+    if current_price is not None and prev_close and prev_close > 0:
+        change_percent = (current_price - prev_close) / prev_close * 100
+
+    quote_time = None
+    if len(parts) > 30:
+        quote_time = parts[30].decode("ascii", errors="ignore") or None
+    return ParsedQuote(
+        raw_name=parts[1] or None,
+        price=current_price,
+        change_percent=change_percent,
+        quote_time=quote_time,
+    )
+
+
+def _as_float(value: bytes | str | float | None) -> float | None:
+    if value is None or value == b"" or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
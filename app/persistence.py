@@ -0,0 +1,192 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager, suppress
+from pathlib import Path
+
+from app.metrics import CONFIG_FLUSH_SECONDS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+FileStamp = tuple[int, int]
+UMASK = os.umask(0)
+os.umask(UMASK)
+NEW_FILE_MODE = 0o666 & ~UMASK
+
+
+def read_file_stamp(path: Path) -> FileStamp:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def write_atomic(path: Path, data: str | bytes, exclusive: bool = False) -> FileStamp:
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data.encode("utf-8") if isinstance(data, str) else data)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            shutil.copymode(path, temp_name)
+        except FileNotFoundError:
+            os.chmod(temp_name, NEW_FILE_MODE)
+        except OSError:
+            pass
+        if exclusive:
+            os.link(temp_name, path)
+            with suppress(OSError):
+                os.unlink(temp_name)
+        else:
+            os.replace(temp_name, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(temp_name)
+        raise
+
+    with suppress(OSError, AttributeError):
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return read_file_stamp(path)
+
+
+def _lock_fd(fd: int, blocking: bool) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+
+
+def _unlock_fd(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    def __init__(
+        self, path: Path, timeout_seconds: float = 30.0, poll_interval_seconds: float = 0.005
+    ) -> None:
+        self._path = path
+        self._timeout = timeout_seconds
+        self._poll_interval = poll_interval_seconds
+        self._contended = 0
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def stats(self) -> dict[str, int]:
+        return {"contended": self._contended}
+
+    @asynccontextmanager
+    async def hold(self) -> AsyncIterator[None]:
+        fd = self._open()
+        try:
+            deadline = time.monotonic() + self._timeout
+            delay = self._poll_interval
+            while not self._try_lock(fd):
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"等待文件锁超时: {self._path}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.1)
+            try:
+                yield
+            finally:
+                _unlock_fd(fd)
+        finally:
+            os.close(fd)
+
+    @contextmanager
+    def hold_blocking(self) -> Iterator[None]:
+        fd = self._open()
+        try:
+            _lock_fd(fd, blocking=True)
+            try:
+                yield
+            finally:
+                _unlock_fd(fd)
+        finally:
+            os.close(fd)
+
+    def _open(self) -> int:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        return os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            _lock_fd(fd, blocking=False)
+        except OSError:
+            self._contended += 1
+            return False
+        return True
+
+
+def lock_path_for(path: Path) -> Path:
+    return path.parent / f".{path.name}.lock"
+
+
+class DebouncedFileWriter:
+    def __init__(
+        self,
+        path: Path,
+        flush_delay_seconds: float = 0.05,
+        on_flushed: Callable[[FileStamp], None] | None = None,
+    ) -> None:
+        self._path = path
+        self._flush_delay = flush_delay_seconds
+        self._on_flushed = on_flushed
+        self._pending: asyncio.Future[FileStamp] | None = None
+        self._serialize: Callable[[], str] | None = None
+        self._flush_task: asyncio.Task[None] | None = None
+        self._requests = 0
+        self._flushes = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._flush_task is not None and not self._flush_task.done()
+
+    def stats(self) -> dict[str, int]:
+        return {"write_requests": self._requests, "flushes": self._flushes}
+
+    async def write(self, serialize: Callable[[], str]) -> FileStamp:
+        self._requests += 1
+        self._serialize = serialize
+        if self._pending is None:
+            self._pending = asyncio.get_running_loop().create_future()
+        if not self.busy:
+            self._flush_task = asyncio.create_task(self._run())
+        return await asyncio.shield(self._pending)
+
+    async def _run(self) -> None:
+        while self._pending is not None:
+            await asyncio.sleep(self._flush_delay)
+            future, serialize = self._pending, self._serialize
+            self._pending = None
+            self._serialize = None
+            try:
+                with CONFIG_FLUSH_SECONDS.time():
+                    stamp = await asyncio.to_thread(write_atomic, self._path, serialize())
+            except Exception as error:
+                future.set_exception(error)
+                future.exception()
+            else:
+                self._flushes += 1
+                if self._on_flushed:
+                    self._on_flushed(stamp)
+                future.set_result(stamp)
+
+    async def drain(self) -> None:
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
@@ -0,0 +1,79 @@
+from collections import deque
+from dataclasses import dataclass
+
+from app.schemas import PositionConfig
+
+ROLLUP_RESOLUTIONS: dict[str, tuple[int, int]] = {
+    "minute": (60, 7 * 24 * 60),
+    "hour": (3600, 180 * 24),
+    "day": (86400, 3650),
+}
+
+PositionKey = tuple[str, str]
+
+
+@dataclass
+class RollupPoint:
+    bucket: int
+    market_value: float
+    cost_value: float
+
+
+@dataclass
+class _TrackedPosition:
+    units: float
+    cost_value: float
+    price: float | None = None
+
+
+class PortfolioPnlTracker:
+    def __init__(self) -> None:
+        self._positions: dict[PositionKey, _TrackedPosition] = {}
+        self._market_value = 0.0
+        self._priced_cost = 0.0
+        self._rollups: dict[str, deque[RollupPoint]] = {
+            name: deque(maxlen=retention) for name, (_, retention) in ROLLUP_RESOLUTIONS.items()
+        }
+
+    def sync(self, positions: dict[PositionKey, PositionConfig]) -> None:
+        previous = self._positions
+        self._positions = {}
+        self._market_value = 0.0
+        self._priced_cost = 0.0
+        for key, position in positions.items():
+            known = previous.get(key)
+            tracked = _TrackedPosition(
+                units=position.units,
+                cost_value=position.units * position.cost_price,
+                price=known.price if known else None,
+            )
+            self._positions[key] = tracked
+            if tracked.price is not None:
+                self._market_value += tracked.units * tracked.price
+                self._priced_cost += tracked.cost_value
+
+    def apply_quote(self, key: PositionKey, price: float, timestamp: int) -> None:
+        tracked = self._positions.get(key)
+        if tracked is None:
+            return
+
+        if tracked.price is None:
+            self._priced_cost += tracked.cost_value
+            self._market_value += tracked.units * price
+        else:
+            self._market_value += tracked.units * (price - tracked.price)
+        tracked.price = price
+        self._record(timestamp)
+
+    def points(self, resolution: str, start: int, end: int) -> list[RollupPoint]:
+        return [point for point in self._rollups[resolution] if start <= point.bucket <= end]
+
+    def _record(self, timestamp: int) -> None:
+        for name, (seconds, _) in ROLLUP_RESOLUTIONS.items():
+            bucket = timestamp - timestamp % seconds
+            rollup = self._rollups[name]
+            if rollup and rollup[-1].bucket == bucket:
+                rollup[-1].market_value = self._market_value
+                rollup[-1].cost_value = self._priced_cost
+            elif not rollup or rollup[-1].bucket < bucket:
+                rollup.append(RollupPoint(bucket, self._market_value, self._priced_cost))
@@ -0,0 +1,219 @@
+import asyncio
+import re
+import time
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+
+from app.persistence import write_atomic
+from app.schemas import (
+    PortfolioAggregateSnapshot,
+    PortfolioConfig,
+    PortfolioMeta,
+    PortfolioSummary,
+    PortfolioTotals,
+    PositionQuote,
+)
+from app.service import PortfolioService
+
+PORTFOLIO_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+DEFAULT_PORTFOLIO_ID = "default"
+RESERVED_IDS = {"aggregate"}
+
+
+class PortfolioRegistry:
+    def __init__(
+        self,
+        root: Path,
+        service_factory: Callable[[Path], PortfolioService],
+        default_service: PortfolioService | None = None,
+        idle_seconds: float = 600.0,
+        sweep_interval_seconds: float = 60.0,
+    ) -> None:
+        self._root = root
+        self._service_factory = service_factory
+        self._default_service = default_service
+        self._idle_seconds = idle_seconds
+        self._sweep_interval = sweep_interval_seconds
+        self._services: dict[str, PortfolioService] = {}
+        self._last_used: dict[str, float] = {}
+        self._sweep_task: asyncio.Task[None] | None = None
+        self._loads = 0
+        self._evictions = 0
+
+    def start(self) -> None:
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+        services = list(self._services.values())
+        self._services.clear()
+        self._last_used.clear()
+        await asyncio.gather(*(service.close() for service in services))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "loaded": len(self._services),
+            "loads": self._loads,
+            "evictions": self._evictions,
+        }
+
+    def ids(self) -> list[str]:
+        ids = [DEFAULT_PORTFOLIO_ID] if self._default_service else []
+        if self._root.is_dir():
+            ids.extend(
+                sorted(
+                    path.stem
+                    for path in self._root.glob("*.json")
+                    if self._is_valid_id(path.stem) and path.stem != DEFAULT_PORTFOLIO_ID
+                )
+            )
+        return ids
+
+    def get(self, portfolio_id: str) -> PortfolioService:
+        if portfolio_id == DEFAULT_PORTFOLIO_ID and self._default_service:
+            return self._default_service
+        if not self._is_valid_id(portfolio_id):
+            raise ValueError(f"组合 ID 无效：{portfolio_id}")
+
+        service = self._services.get(portfolio_id)
+        if service is None:
+            path = self._config_path(portfolio_id)
+            if not path.is_file():
+                raise LookupError(f"组合 {portfolio_id} 不存在")
+            service = self._service_factory(path)
+            self._services[portfolio_id] = service
+            self._loads += 1
+        self._last_used[portfolio_id] = time.monotonic()
+        return service
+
+    async def create(self, portfolio_id: str, config: PortfolioConfig) -> PortfolioService:
+        if portfolio_id == DEFAULT_PORTFOLIO_ID or not self._is_valid_id(portfolio_id):
+            raise ValueError(f"组合 ID 无效：{portfolio_id}")
+        path = self._config_path(portfolio_id)
+        if portfolio_id in self._services:
+            raise ValueError(f"组合 {portfolio_id} 已存在")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            await asyncio.to_thread(write_atomic, path, config.model_dump_json(indent=2), True)
+        except FileExistsError:
+            raise ValueError(f"组合 {portfolio_id} 已存在") from None
+        return self.get(portfolio_id)
+
+    async def get_aggregate_snapshot(self) -> PortfolioAggregateSnapshot:
+        ids = self.ids()
+        services = [self.get(portfolio_id) for portfolio_id in ids]
+        snapshots = await asyncio.gather(
+            *(service.get_snapshot() for service in services), return_exceptions=True
+        )
+
+        summaries: list[PortfolioSummary] = []
+        merged: dict[tuple[str, str], PositionQuote] = {}
+        base_currency = None
+        refresh_seconds = None
+        for portfolio_id, snapshot in zip(ids, snapshots):
+            if isinstance(snapshot, BaseException):
+                if not isinstance(snapshot, Exception):
+                    raise snapshot
+                summaries.append(PortfolioSummary(id=portfolio_id, status="error", error=str(snapshot)))
+                continue
+
+            summaries.append(
+                PortfolioSummary(
+                    id=portfolio_id,
+                    status="ok",
+                    base_currency=snapshot.meta.base_currency,
+                    totals=snapshot.totals,
+                )
+            )
+            base_currency = base_currency or snapshot.meta.base_currency
+            if refresh_seconds is None or snapshot.meta.refresh_seconds < refresh_seconds:
+                refresh_seconds = snapshot.meta.refresh_seconds
+            for position in snapshot.positions:
+                self._merge_position(merged, position)
+
+        positions = list(merged.values())
+        meta = PortfolioMeta(
+            base_currency=base_currency or "CNY",
+            refresh_seconds=refresh_seconds or 15,
+            updated_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        return PortfolioAggregateSnapshot(
+            meta=meta,
+            totals=self._sum_totals([summary.totals for summary in summaries if summary.totals]),
+            portfolios=summaries,
+            positions=positions,
+        )
+
+    async def evict_idle(self) -> int:
+        deadline = time.monotonic() - self._idle_seconds
+        idle = [
+            portfolio_id
+            for portfolio_id, service in self._services.items()
+            if self._last_used.get(portfolio_id, 0) <= deadline and not service.busy
+        ]
+        for portfolio_id in idle:
+            service = self._services.pop(portfolio_id)
+            self._last_used.pop(portfolio_id, None)
+            await service.close()
+        self._evictions += len(idle)
+        return len(idle)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            await self.evict_idle()
+
+    def _merge_position(
+        self, merged: dict[tuple[str, str], PositionQuote], position: PositionQuote
+    ) -> None:
+        key = (position.asset_type, position.code)
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = position.model_copy()
+            return
+
+        units = round(existing.units + position.units, 4)
+        cost_value = round(existing.cost_value + position.cost_value, 2)
+        existing.units = units
+        existing.cost_value = cost_value
+        existing.cost_price = round(cost_value / units, 6) if units > 0 else existing.cost_price
+        if existing.status != "ok" or position.status != "ok":
+            existing.status = "error"
+            existing.error = existing.error or position.error
+            existing.market_value = None
+            existing.pnl_amount = None
+            existing.pnl_percent = None
+            return
+
+        existing.market_value = round((existing.market_value or 0) + (position.market_value or 0), 2)
+        existing.pnl_amount = round(existing.market_value - cost_value, 2)
+        existing.pnl_percent = round(existing.pnl_amount / cost_value * 100, 2) if cost_value > 0 else 0.0
+        existing.stale = existing.stale or position.stale
+
+    def _sum_totals(self, totals: list[PortfolioTotals]) -> PortfolioTotals:
+        total_cost = round(sum(item.total_cost for item in totals), 2)
+        total_market_value = round(sum(item.total_market_value for item in totals), 2)
+        total_pnl_amount = round(total_market_value - total_cost, 2)
+        return PortfolioTotals(
+            total_cost=total_cost,
+            total_market_value=total_market_value,
+            total_pnl_amount=total_pnl_amount,
+            total_pnl_percent=round(total_pnl_amount / total_cost * 100, 2) if total_cost > 0 else 0.0,
+            successful_positions=sum(item.successful_positions for item in totals),
+            failed_positions=sum(item.failed_positions for item in totals),
+        )
+
+    def _config_path(self, portfolio_id: str) -> Path:
+        return self._root / f"{portfolio_id}.json"
+
+    def _is_valid_id(self, portfolio_id: str) -> bool:
+        return bool(PORTFOLIO_ID.match(portfolio_id)) and portfolio_id not in RESERVED_IDS
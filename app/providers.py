@@ -1,15 +1,63 @@
-import json
+import asyncio
 import re
 import time
-from dataclasses import dataclass
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, TypeVar
 
 import httpx
 
+from app.cache import CacheEntry, QuoteCache
+from app.metrics import UPSTREAM_REQUEST_SECONDS
+from app.parsers import (
+    PayloadFormatError,
+    index_tencent_payloads,
+    parse_fund_jsonp,
+    parse_tencent_payload,
+)
+from app.resilience import (
+    BudgetExceededError,
+    CircuitBreaker,
+    RetryPolicy,
+    call_with_retry,
+    create_detached_task,
+    remaining_budget,
+)
+from app.trading_calendar import QuoteExpiryPolicy
+from app.transport import RateLimitedTransport, TransportConfig
+
+if TYPE_CHECKING:
+    from app.multiworker import SharedQuoteStore
+
+T = TypeVar("T")
+
 
 class DataProviderError(RuntimeError):
+    def __init__(self, message: str = "", status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UpstreamUnavailableError(DataProviderError):
     pass
 
 
+class QuoteBudgetExceededError(DataProviderError):
+    pass
+
+
+def upstream_status(error: BaseException) -> str:
+    if isinstance(error, DataProviderError) and error.status_code is not None:
+        return str(error.status_code)
+    if isinstance(error, asyncio.TimeoutError | httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.TransportError):
+        return "transport_error"
+    if isinstance(error, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
+
 @dataclass
 class RawQuote:
     code: str
@@ -18,99 +66,543 @@ class RawQuote:
     change_percent: float | None
     quote_time: str | None
     source: str
+    stale: bool = False
+
+
+FundSource = Callable[[str], Awaitable[RawQuote]]
+StockBatchSource = Callable[[list[str]], Awaitable[dict[str, RawQuote | DataProviderError]]]
+
+SINA_HEADERS = {"Referer": "https://finance.sina.com.cn"}
 
 
 class QuoteProvider:
-    def __init__(self, cache_ttl_seconds: int = 8, timeout_seconds: float = 8.0) -> None:
-        self._cache_ttl = cache_ttl_seconds
-        self._cache: dict[str, tuple[float, RawQuote]] = {}
+    def __init__(
+        self,
+        cache_ttl_seconds: float = 8,
+        timeout_seconds: float = 8.0,
+        stock_batch_size: int = 50,
+        stale_ttl_seconds: float = 60,
+        negative_ttl_seconds: float = 20,
+        cache_max_entries: int = 4096,
+        transport_config: TransportConfig | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breaker_failure_threshold: int = 5,
+        breaker_reset_seconds: float = 30,
+        fallback_sources: bool = True,
+        expiry_policy: QuoteExpiryPolicy | None = None,
+        restored_stale_seconds: float = 900,
+        shared_cache: "SharedQuoteStore | None" = None,
+    ) -> None:
+        self._stock_batch_size = max(1, stock_batch_size)
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._breaker_failure_threshold = breaker_failure_threshold
+        self._breaker_reset_seconds = breaker_reset_seconds
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._fund_sources: list[tuple[str, FundSource]] = [("eastmoney", self._fetch_fund_quote)]
+        self._stock_sources: list[tuple[str, StockBatchSource]] = [
+            ("tencent", self._fetch_stock_quote_batch)
+        ]
+        if fallback_sources:
+            self._fund_sources.append(("sina", self._fetch_sina_fund_quote))
+            self._stock_sources.append(("sina", self._fetch_sina_stock_batch))
+        self._cache: QuoteCache[RawQuote] = QuoteCache(
+            max_entries=cache_max_entries,
+            fresh_ttl_seconds=cache_ttl_seconds,
+            stale_ttl_seconds=stale_ttl_seconds,
+            negative_ttl_seconds=negative_ttl_seconds,
+        )
+        self._expiry_policy = expiry_policy or QuoteExpiryPolicy(trading_ttl_seconds=cache_ttl_seconds)
+        self._restored_stale_seconds = restored_stale_seconds
+        self._shared_cache = shared_cache
+        self._inflight: dict[str, asyncio.Future[RawQuote]] = {}
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+        self._upstream_fetches = 0
+        self._coalesced_requests = 0
+        self._background_refreshes = 0
+        self._last_known_fallbacks = 0
+        self._quote_listeners: list[tuple[Callable[[str, RawQuote], None], bool]] = []
+        self._transport = RateLimitedTransport(transport_config)
         self._client = httpx.AsyncClient(
             timeout=timeout_seconds,
+            transport=self._transport,
             headers={
                 "User-Agent": "Mozilla/5.0 (FundStockEstimator/1.0)",
             },
         )
 
     async def close(self) -> None:
+        for future in list(self._inflight.values()):
+            future.cancel()
+        for task in list(self._batch_tasks):
+            task.cancel()
         await self._client.aclose()
 
+    def stats(self) -> dict[str, int]:
+        return {
+            "upstream_fetches": self._upstream_fetches,
+            "coalesced_requests": self._coalesced_requests,
+            "background_refreshes": self._background_refreshes,
+            "last_known_fallbacks": self._last_known_fallbacks,
+            "inflight": len(self._inflight),
+            **{f"cache_{name}": value for name, value in self._cache.stats().items()},
+        }
+
+    def transport_stats(self) -> dict[str, dict[str, float]]:
+        return self._transport.stats()
+
+    def source_stats(self) -> dict[str, dict[str, int | str]]:
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
+
+    def export_quotes(self) -> list[tuple[str, RawQuote]]:
+        return self._cache.export()
+
+    def restore_quotes(self, items: Iterable[tuple[str, RawQuote]]) -> int:
+        restored = 0
+        for cache_key, quote in items:
+            if self._cache.restore(cache_key, replace(quote, stale=True), self._restored_stale_seconds):
+                restored += 1
+        return restored
+
+    def add_quote_listener(
+        self, listener: Callable[[str, RawQuote], None], include_shared: bool = True
+    ) -> None:
+        self._quote_listeners.append((listener, include_shared))
+
+    def remove_quote_listener(self, listener: Callable[[str, RawQuote], None]) -> None:
+        self._quote_listeners = [item for item in self._quote_listeners if item[0] != listener]
+
+    def register_fund_source(self, name: str, fetch: FundSource, primary: bool = False) -> None:
+        self._fund_sources.insert(0 if primary else len(self._fund_sources), (name, fetch))
+
+    def register_stock_source(self, name: str, fetch: StockBatchSource, primary: bool = False) -> None:
+        self._stock_sources.insert(0 if primary else len(self._stock_sources), (name, fetch))
+
     async def get_quote(self, asset_type: str, code: str) -> RawQuote:
         normalized_code = code.strip()
         cache_key = f"{asset_type}:{normalized_code}"
-        cached = self._cache.get(cache_key)
-        if cached and time.monotonic() - cached[0] < self._cache_ttl:
-            return cached[1]
-
-        if asset_type == "fund":
-            quote = await self._fetch_fund_quote(normalized_code)
-        elif asset_type == "stock":
-            quote = await self._fetch_stock_quote(normalized_code)
+        state, entry = self._cache.lookup(cache_key)
+        if state == "negative":
+            outcome = self._negative_result(entry)
+            if isinstance(outcome, DataProviderError):
+                raise outcome
+            return outcome
+        if state == "fresh":
+            return entry.value
+
+        future = self._inflight.get(cache_key)
+        if future:
+            self._coalesced_requests += 1
+        else:
+            future = create_detached_task(self._fetch_quote(asset_type, normalized_code))
+            self._track_inflight(cache_key, future)
+            if state == "stale":
+                self._background_refreshes += 1
+
+        if state == "stale":
+            return entry.value
+        budget = remaining_budget()
+        if budget is None:
+            return await asyncio.shield(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=max(0, budget))
+        except asyncio.TimeoutError:
+            outcome = self._budget_fallback(cache_key)
+            if isinstance(outcome, DataProviderError):
+                raise outcome from None
+            return outcome
+
+    async def get_quotes(
+        self, asset_type: str, codes: list[str], allow_stale: bool = True
+    ) -> dict[str, RawQuote | DataProviderError]:
+        futures: dict[str, asyncio.Future[RawQuote]] = {}
+        results: dict[str, RawQuote | DataProviderError] = {}
+        pending: list[str] = []
+        for code in dict.fromkeys(code.strip() for code in codes):
+            cache_key = f"{asset_type}:{code}"
+            state, entry = self._cache.lookup(cache_key)
+            if state == "stale" and not allow_stale:
+                state = "miss"
+            if state == "negative":
+                results[code] = self._negative_result(entry)
+                continue
+            if state in ("fresh", "stale"):
+                results[code] = entry.value
+            if state == "fresh":
+                continue
+
+            if cache_key in self._inflight:
+                self._coalesced_requests += 1
+                if state == "miss":
+                    futures[code] = self._inflight[cache_key]
+            else:
+                pending.append(code)
+                if state == "stale":
+                    self._background_refreshes += 1
+
+        if asset_type == "stock" and pending:
+            loop = asyncio.get_running_loop()
+            for index in range(0, len(pending), self._stock_batch_size):
+                chunk = {
+                    code: loop.create_future() for code in pending[index : index + self._stock_batch_size]
+                }
+                for code, future in chunk.items():
+                    self._track_inflight(f"stock:{code}", future)
+                task = create_detached_task(self._resolve_stock_batch(chunk))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._batch_tasks.discard)
+                futures.update((code, future) for code, future in chunk.items() if code not in results)
         else:
+            for code in pending:
+                future = create_detached_task(self._fetch_quote(asset_type, code))
+                self._track_inflight(f"{asset_type}:{code}", future)
+                if code not in results:
+                    futures[code] = future
+
+        if futures:
+            budget = remaining_budget()
+            await asyncio.wait(set(futures.values()), timeout=None if budget is None else max(0, budget))
+        for code, future in futures.items():
+            if not future.done():
+                results[code] = self._budget_fallback(f"{asset_type}:{code}")
+            elif future.cancelled():
+                results[code] = self._as_provider_error(asyncio.CancelledError())
+            elif future.exception() is not None:
+                results[code] = self._as_provider_error(future.exception())
+            else:
+                results[code] = future.result()
+        return results
+
+    async def _fetch_quote(self, asset_type: str, code: str) -> RawQuote:
+        if asset_type not in ("fund", "stock"):
             raise DataProviderError(f"不支持的资产类型: {asset_type}")
 
-        self._cache[cache_key] = (time.monotonic(), quote)
-        return quote
+        outcomes, shared_ttls = await self._fetch_outcomes(asset_type, [code])
+        outcome = outcomes[code]
+        if isinstance(outcome, DataProviderError):
+            return self._fall_back(f"{asset_type}:{code}", outcome)
+        self._store_quote(asset_type, code, outcome, shared_ttls.get(code))
+        return outcome
+
+    async def _resolve_stock_batch(self, futures: dict[str, asyncio.Future[RawQuote]]) -> None:
+        try:
+            outcomes, shared_ttls = await self._fetch_outcomes("stock", list(futures))
+        except BaseException:
+            for future in futures.values():
+                future.cancel()
+            raise
+
+        for code, future in futures.items():
+            outcome = outcomes[code]
+            if isinstance(outcome, RawQuote):
+                self._store_quote("stock", code, outcome, shared_ttls.get(code))
+                future.set_result(outcome)
+                continue
+            try:
+                future.set_result(self._fall_back(f"stock:{code}", outcome))
+            except DataProviderError as error:
+                future.set_exception(error)
+
+    async def _fetch_outcomes(
+        self, asset_type: str, codes: list[str]
+    ) -> tuple[dict[str, RawQuote | DataProviderError], dict[str, float]]:
+        if self._shared_cache is None:
+            return await self._fetch_upstream(asset_type, codes), {}
+        return await self._shared_cache.fetch(
+            asset_type,
+            codes,
+            lambda missing: self._fetch_upstream(asset_type, missing),
+            lambda code, quote: self._expiry_policy.ttl_seconds(asset_type, quote.code, quote.quote_time),
+        )
+
+    async def _fetch_upstream(
+        self, asset_type: str, codes: list[str]
+    ) -> dict[str, RawQuote | DataProviderError]:
+        self._upstream_fetches += len(codes)
+        if asset_type == "stock":
+            return await self._fetch_stock_chain(codes)
+        results: dict[str, RawQuote | DataProviderError] = {}
+        for code in codes:
+            try:
+                results[code] = await self._fetch_fund_chain(code)
+            except DataProviderError as error:
+                results[code] = error
+        return results
+
+    async def _fetch_fund_chain(self, code: str) -> RawQuote:
+        errors: list[DataProviderError] = []
+        for name, fetch in self._fund_sources:
+            try:
+                return await self._call_source(name, lambda: fetch(code))
+            except QuoteBudgetExceededError:
+                raise
+            except DataProviderError as error:
+                errors.append(error)
+        raise self._combine_errors(errors)
+
+    async def _fetch_stock_chain(self, codes: list[str]) -> dict[str, RawQuote | DataProviderError]:
+        results: dict[str, RawQuote | DataProviderError] = {}
+        remaining = list(codes)
+        for name, fetch in self._stock_sources:
+            if not remaining:
+                break
+            batch = remaining
+            try:
+                outcomes = await self._call_source(name, lambda: fetch(batch))
+            except QuoteBudgetExceededError as error:
+                results.update(dict.fromkeys(batch, error))
+                break
+            except DataProviderError as error:
+                outcomes = dict.fromkeys(batch, error)
+            for code in batch:
+                results[code] = outcomes.get(code) or DataProviderError("股票接口未返回该代码")
+            remaining = [code for code in batch if not isinstance(results[code], RawQuote)]
+        return results
+
+    async def _call_source(self, name: str, operation: Callable[[], Awaitable[T]]) -> T:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(self._breaker_failure_threshold, self._breaker_reset_seconds)
+            self._breakers[name] = breaker
+        if not breaker.allow():
+            raise UpstreamUnavailableError(f"{name} 数据源暂不可用（熔断中）")
+
+        try:
+            result = await call_with_retry(
+                lambda: self._timed(name, operation), self._retry_policy, self._is_retryable
+            )
+        except Exception as error:
+            if isinstance(error, BudgetExceededError):
+                breaker.release_probe()
+            elif self._is_retryable(error):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise self._as_provider_error(error) from error
+
+        breaker.record_success()
+        return result
+
+    async def _timed(self, name: str, operation: Callable[[], Awaitable[T]]) -> T:
+        started_at = time.perf_counter()
+        status = "ok"
+        try:
+            return await operation()
+        except BaseException as error:
+            status = upstream_status(error)
+            raise
+        finally:
+            UPSTREAM_REQUEST_SECONDS.observe(time.perf_counter() - started_at, name, status)
+
+    def _store_quote(
+        self, asset_type: str, code: str, quote: RawQuote, shared_ttl: float | None = None
+    ) -> None:
+        if shared_ttl is None:
+            ttl = self._expiry_policy.ttl_seconds(asset_type, quote.code, quote.quote_time)
+        else:
+            ttl = shared_ttl
+        self._cache.put(f"{asset_type}:{code}", quote, ttl)
+        for listener, include_shared in self._quote_listeners:
+            if shared_ttl is None or include_shared:
+                listener(asset_type, quote)
+
+    def _fall_back(self, cache_key: str, error: DataProviderError) -> RawQuote:
+        if not isinstance(error, QuoteBudgetExceededError):
+            self._cache.put_error(cache_key, error)
+        last_known = self._cache.last_known(cache_key)
+        if last_known is None:
+            raise error
+        self._last_known_fallbacks += 1
+        return replace(last_known, stale=True)
+
+    def _budget_fallback(self, cache_key: str) -> RawQuote | DataProviderError:
+        last_known = self._cache.last_known(cache_key)
+        if last_known is None:
+            return QuoteBudgetExceededError("行情请求超出时间预算")
+        self._last_known_fallbacks += 1
+        return replace(last_known, stale=True)
+
+    def _negative_result(self, entry: CacheEntry[RawQuote]) -> RawQuote | DataProviderError:
+        if entry.fallback is not None:
+            return replace(entry.fallback, stale=True)
+        return self._as_provider_error(entry.error)
+
+    def _is_retryable(self, error: Exception) -> bool:
+        return isinstance(error, UpstreamUnavailableError | httpx.TransportError)
+
+    def _combine_errors(self, errors: list[DataProviderError]) -> DataProviderError:
+        if len(errors) == 1:
+            return errors[0]
+        message = "；".join(str(error) for error in errors)
+        if all(isinstance(error, UpstreamUnavailableError) for error in errors):
+            return UpstreamUnavailableError(message)
+        return DataProviderError(message)
+
+    def _check_status(self, response: httpx.Response, label: str) -> None:
+        if response.status_code == 200:
+            return
+        message = f"{label}请求失败: {response.status_code}"
+        if response.status_code == 429 or response.status_code >= 500:
+            raise UpstreamUnavailableError(message, response.status_code)
+        raise DataProviderError(message, response.status_code)
+
+    def _track_inflight(self, cache_key: str, future: asyncio.Future[RawQuote]) -> None:
+        self._inflight[cache_key] = future
+
+        def _release(done: asyncio.Future[RawQuote]) -> None:
+            if self._inflight.get(cache_key) is done:
+                del self._inflight[cache_key]
+            if not done.cancelled():
+                done.exception()
+
+        future.add_done_callback(_release)
+
+    def _as_provider_error(self, error: BaseException) -> DataProviderError:
+        if isinstance(error, DataProviderError):
+            return error
+        if isinstance(error, BudgetExceededError):
+            return QuoteBudgetExceededError(str(error))
+        if isinstance(error, httpx.TimeoutException | asyncio.TimeoutError):
+            return UpstreamUnavailableError("行情接口请求超时")
+        if isinstance(error, httpx.TransportError):
+            return UpstreamUnavailableError(str(error) or type(error).__name__)
+        return DataProviderError(str(error) or type(error).__name__)
 
     async def _fetch_fund_quote(self, code: str) -> RawQuote:
         url = f"https://fundgz.1234567.com.cn/js/{code}.js"
         response = await self._client.get(url)
-        if response.status_code != 200:
-            raise DataProviderError(f"基金接口请求失败: {response.status_code}")
-
-        match = re.search(r"jsonpgz\((.*?)\);?$", response.text.strip())
-        if not match:
-            raise DataProviderError("基金接口返回格式异常")
+        self._check_status(response, "基金接口")
 
-        payload = json.loads(match.group(1))
-        price = self._as_float(payload.get("gsz"))
-        if price is None:
+        try:
+            parsed = parse_fund_jsonp(response.content)
+        except PayloadFormatError as error:
+            raise DataProviderError(str(error)) from error
+        if parsed.price is None:
             raise DataProviderError("基金估值为空")
 
-        change_percent = self._as_float(payload.get("gszzl"))
-        name = payload.get("name") or code
-        quote_time = payload.get("gztime")
         return RawQuote(
             code=code,
-            name=name,
-            price=price,
-            change_percent=change_percent,
-            quote_time=quote_time,
+            name=parsed.name or code,
+            price=parsed.price,
+            change_percent=parsed.change_percent,
+            quote_time=parsed.quote_time,
             source="eastmoney",
         )
 
-    async def _fetch_stock_quote(self, code: str) -> RawQuote:
-        normalized_code = self.normalize_stock_code(code)
-        url = f"https://qt.gtimg.cn/q={normalized_code}"
-        response = await self._client.get(url)
-        if response.status_code != 200:
-            raise DataProviderError(f"股票接口请求失败: {response.status_code}")
+    async def _fetch_sina_fund_quote(self, code: str) -> RawQuote:
+        response = await self._client.get(f"https://hq.sinajs.cn/list=f_{code}", headers=SINA_HEADERS)
+        self._check_status(response, "新浪基金接口")
 
-        text = response.content.decode("gbk", errors="ignore").strip()
-        match = re.search(r'="(.*)";?$', text)
-        if not match:
-            raise DataProviderError("股票接口返回格式异常")
+        text = response.content.decode("gbk", errors="ignore")
+        match = re.search(r'="([^"]*)"', text)
+        if not match or not match.group(1):
+            raise DataProviderError("新浪基金接口未返回该代码")
 
-        parts = match.group(1).split("~")
+        parts = match.group(1).split(",")
         if len(parts) < 5:
-            raise DataProviderError("股票接口返回字段不足")
+            raise DataProviderError("新浪基金接口返回字段不足")
 
-        name = parts[1] or normalized_code
-        current_price = self._as_float(parts[3])
-        prev_close = self._as_float(parts[4])
-        if current_price is None:
-            raise DataProviderError("股票价格为空")
+        price = self._as_float(parts[1])
+        if price is None or price <= 0:
+            raise DataProviderError("基金净值为空")
 
+        prev_price = self._as_float(parts[3])
         change_percent = None
-        if prev_close and prev_close > 0:
-            change_percent = (current_price - prev_close) / prev_close * 100
+        if prev_price and prev_price > 0:
+            change_percent = (price - prev_price) / prev_price * 100
 
-        quote_time = parts[30] if len(parts) > 30 and parts[30] else None
         return RawQuote(
-            code=normalized_code,
-            name=name,
-            price=current_price,
+            code=code,
+            name=parts[0] or code,
+            price=price,
             change_percent=change_percent,
-            quote_time=quote_time,
+            quote_time=parts[4] or None,
+            source="sina",
+        )
+
+    async def _fetch_stock_quote_batch(
+        self, codes: list[str]
+    ) -> dict[str, RawQuote | DataProviderError]:
+        codes_by_symbol: dict[str, list[str]] = {}
+        for code in codes:
+            codes_by_symbol.setdefault(self.normalize_stock_code(code), []).append(code)
+
+        url = f"https://qt.gtimg.cn/q={','.join(codes_by_symbol)}"
+        response = await self._client.get(url)
+        self._check_status(response, "股票接口")
+
+        payloads = index_tencent_payloads(response.content)
+        results: dict[str, RawQuote | DataProviderError] = {}
+        for symbol, original_codes in codes_by_symbol.items():
+            payload = payloads.get(symbol.lower())
+            try:
+                if payload is None:
+                    raise DataProviderError("股票接口未返回该代码")
+                outcome: RawQuote | DataProviderError = self._parse_stock_fields(symbol, payload)
+            except DataProviderError as error:
+                outcome = error
+            for code in original_codes:
+                results[code] = outcome
+        return results
+
+    async def _fetch_sina_stock_batch(
+        self, codes: list[str]
+    ) -> dict[str, RawQuote | DataProviderError]:
+        results: dict[str, RawQuote | DataProviderError] = {}
+        codes_by_symbol: dict[str, list[str]] = {}
+        for code in codes:
+            symbol = self.normalize_stock_code(code)
+            if symbol.startswith(("sh", "sz")):
+                codes_by_symbol.setdefault(symbol, []).append(code)
+            else:
+                results[code] = DataProviderError("备用股票数据源不支持该市场")
+        if not codes_by_symbol:
+            return results
+
+        url = f"https://hq.sinajs.cn/list={','.join(codes_by_symbol)}"
+        response = await self._client.get(url, headers=SINA_HEADERS)
+        self._check_status(response, "新浪股票接口")
+
+        text = response.content.decode("gbk", errors="ignore")
+        payloads = {
+            match.group(1): match.group(2)
+            for match in re.finditer(r'hq_str_([a-z0-9]+)="([^"]*)"', text)
+        }
+        for symbol, original_codes in codes_by_symbol.items():
+            parts = payloads.get(symbol, "").split(",")
+            current_price = self._as_float(parts[3]) if len(parts) > 31 else None
+            outcome: RawQuote | DataProviderError
+            if current_price is None or current_price <= 0:
+                outcome = DataProviderError("新浪股票接口未返回有效价格")
+            else:
+                prev_close = self._as_float(parts[2])
+                outcome = RawQuote(
+                    code=symbol,
+                    name=parts[0] or symbol,
+                    price=current_price,
+                    change_percent=(current_price - prev_close) / prev_close * 100
+                    if prev_close and prev_close > 0
+                    else None,
+                    quote_time=f"{parts[30]} {parts[31]}".strip() or None,
+                    source="sina",
+                )
+            for code in original_codes:
+                results[code] = outcome
+        return results
+
+    def _parse_stock_fields(self, normalized_code: str, payload: bytes) -> RawQuote:
+        try:
+            parsed = parse_tencent_payload(payload)
+        except PayloadFormatError as error:
+            raise DataProviderError(str(error)) from error
+        if parsed.price is None:
+            raise DataProviderError("股票价格为空")
+
+        return RawQuote(
+            code=normalized_code,
+            name=parsed.name or normalized_code,
+            price=parsed.price,
+            change_percent=parsed.change_percent,
+            quote_time=parsed.quote_time,
             source="tencent",
         )
 
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from app.schemas import PortfolioSnapshot, PositionConfig
+from app.service import PortfolioService
+from app.trading_calendar import DEFAULT_CALENDAR, TradingCalendar
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotRefresher:
+    def __init__(
+        self,
+        service: PortfolioService,
+        spread_seconds: float = 2.0,
+        slice_size: int = 50,
+        trading_hours_only: bool = True,
+        calendar: TradingCalendar = DEFAULT_CALENDAR,
+    ) -> None:
+        self._service = service
+        self._spread_seconds = spread_seconds
+        self._slice_size = max(1, slice_size)
+        self._trading_hours_only = trading_hours_only
+        self._calendar = calendar
+        self._latest: PortfolioSnapshot | None = None
+        self._latest_version = -1
+        self._sequence = 0
+        self._published = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._pinned = False
+        self._subscribers = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def start(self) -> None:
+        self._pinned = True
+        self._ensure_running()
+
+    @asynccontextmanager
+    async def subscription(self) -> AsyncIterator[None]:
+        self._subscribers += 1
+        self._ensure_running()
+        try:
+            yield
+        finally:
+            self._subscribers -= 1
+            if not self._subscribers and not self._pinned:
+                await self._cancel()
+
+    def _ensure_running(self) -> None:
+        if self._task is None and not self.closed:
+            self._task = asyncio.create_task(self._run())
+
+    def close(self) -> None:
+        self._closed.set()
+
+    async def stop(self) -> None:
+        self.close()
+        await self._cancel()
+
+    async def _cancel(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def latest(self) -> PortfolioSnapshot | None:
+        if self._task is None:
+            return None
+        if self._latest is None or self._latest_version != self._service.config_version:
+            self._wake.set()
+            return None
+        return self._latest
+
+    async def wait_for_update(
+        self, sequence: int, timeout: float
+    ) -> tuple[int, PortfolioSnapshot | None]:
+        if sequence == self._sequence and not self.closed:
+            waiters = {
+                asyncio.ensure_future(self._published.wait()),
+                asyncio.ensure_future(self._closed.wait()),
+            }
+            try:
+                await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+        return self._sequence, self._latest
+
+    async def _run(self) -> None:
+        while True:
+            refresh_seconds = 15
+            try:
+                config = self._service.load_config()
+                refresh_seconds = config.refresh_seconds
+                version = self._service.config_version
+                if (
+                    self._latest is None
+                    or version != self._latest_version
+                    or not self._trading_hours_only
+                    or self._calendar.is_trading_time()
+                ):
+                    await self._warm_quotes(config.positions)
+                    self._latest = await self._service.get_snapshot()
+                    self._latest_version = version
+                    self._publish()
+            except Exception:
+                logger.exception("后台刷新行情失败")
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _publish(self) -> None:
+        self._sequence += 1
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+    async def _warm_quotes(self, positions: list[PositionConfig]) -> None:
+        codes_by_type: dict[str, list[str]] = {}
+        for position in positions:
+            codes_by_type.setdefault(position.asset_type, []).append(position.code)
+
+        slices = [
+            (asset_type, codes[index : index + self._slice_size])
+            for asset_type, codes in codes_by_type.items()
+            for index in range(0, len(codes), self._slice_size)
+        ]
+        if not slices:
+            return
+
+        pause = self._spread_seconds / len(slices)
+        provider = self._service.provider
+        for slice_index, (asset_type, codes) in enumerate(slices):
+            if slice_index:
+                await asyncio.sleep(pause)
+            await provider.get_quotes(asset_type, codes, allow_stale=False)
@@ -0,0 +1,138 @@
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable, Coroutine, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
+from typing import Any, Literal, TypeVar
+
+T = TypeVar("T")
+
+BreakerState = Literal["closed", "open", "half_open"]
+
+_deadline: ContextVar[float | None] = ContextVar("quote_deadline", default=None)
+
+
+@contextmanager
+def quote_deadline(budget_seconds: float | None) -> Iterator[None]:
+    if budget_seconds is None:
+        yield
+        return
+    current = _deadline.get()
+    deadline = time.monotonic() + budget_seconds
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> float | None:
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def create_detached_task(coroutine: Coroutine[Any, Any, T]) -> asyncio.Task[T]:
+    context = copy_context()
+    context.run(_deadline.set, None)
+    return asyncio.get_running_loop().create_task(coroutine, context=context)
+
+
+class BudgetExceededError(asyncio.TimeoutError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._reset_timeout = reset_timeout_seconds
+        self._state: BreakerState = "closed"
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.short_circuits = 0
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state == "open" and time.monotonic() - self._opened_at >= self._reset_timeout:
+            return "half_open"
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._state = "half_open"
+            self._probe_in_flight = True
+            return True
+        self.short_circuits += 1
+        return False
+
+    def record_success(self) -> None:
+        self.successes += 1
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+        self._state = "closed"
+
+    def release_probe(self) -> None:
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        if self._state == "half_open" or self._consecutive_failures >= self._failure_threshold:
+            self._state = "open"
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "short_circuits": self.short_circuits,
+        }
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 3
+    base_delay_seconds: float = 0.2
+    max_delay_seconds: float = 2.0
+
+    def backoff(self, attempt: int) -> float:
+        ceiling = min(self.max_delay_seconds, self.base_delay_seconds * (2**attempt))
+        return random.uniform(0, ceiling)
+
+
+async def call_with_retry(
+    operation: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    is_retryable: Callable[[Exception], bool],
+) -> T:
+    attempt = 0
+    while True:
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            raise BudgetExceededError("行情请求超出时间预算")
+        try:
+            return await operation()
+        except Exception as error:
+            attempt += 1
+            if attempt >= policy.attempts or not is_retryable(error):
+                raise
+            delay = policy.backoff(attempt - 1)
+            budget = remaining_budget()
+            if budget is not None and delay >= budget:
+                raise
+            await asyncio.sleep(delay)
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -34,6 +34,7 @@ class PositionQuote(BaseModel):
     pnl_percent: float | None = None
     source: str | None = None
     quote_time: str | None = None
+    stale: bool = False
     status: Literal["ok", "error"]
     error: str | None = None
 
@@ -66,7 +67,7 @@ class FundImportItem(BaseModel):
 
 
 class FundImportRequest(BaseModel):
-    items: list[FundImportItem] = Field(min_length=1, max_length=100)
+    items: list[FundImportItem] = Field(min_length=1, max_length=5000)
 
 
 class FundImportResult(BaseModel):
@@ -106,6 +107,70 @@ class PositionUpdateRequest(BaseModel):
         return self
 
 
+class PositionBatchOperation(BaseModel):
+    op: Literal["upsert", "patch", "delete"]
+    asset_type: AssetType
+    code: str = Field(min_length=2, max_length=20)
+    name: str | None = Field(default=None, max_length=50)
+    units: float | None = Field(default=None, gt=0)
+    cost_price: float | None = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def validate_fields(self):
+        if self.op == "upsert" and (self.units is None or self.cost_price is None):
+            raise ValueError("upsert 操作需要提供 units 与 cost_price")
+        if self.op == "patch" and self.name is None and self.units is None and self.cost_price is None:
+            raise ValueError("patch 操作至少提供一个待修改字段")
+        return self
+
+
+class PositionBatchRequest(BaseModel):
+    operations: list[PositionBatchOperation] = Field(min_length=1, max_length=5000)
+
+
+class PositionBatchResult(BaseModel):
+    op: Literal["upsert", "patch", "delete"]
+    asset_type: AssetType
+    code: str
+    status: Literal["added", "updated", "deleted", "failed"]
+    position: PositionConfig | None = None
+    error: str | None = None
+
+
+class PositionBatchResponse(BaseModel):
+    added: int
+    updated: int
+    deleted: int
+    failed: int
+    items: list[PositionBatchResult]
+
+
+StatementField = Literal["asset_type", "code", "name", "units", "cost_price", "amount"]
+
+
+class StatementSchema(BaseModel):
+    delimiter: str = Field(default=",", min_length=1, max_length=1)
+    encoding: str = "utf-8-sig"
+    skip_rows: int = Field(default=0, ge=0)
+    default_asset_type: AssetType = "fund"
+    columns: dict[StatementField, list[str]] = Field(default_factory=dict)
+    asset_type_values: dict[str, AssetType] = Field(default_factory=dict)
+
+
+class StatementRowError(BaseModel):
+    line: int
+    code: str | None = None
+    error: str
+
+
+class StatementImportResponse(BaseModel):
+    rows: int
+    added: int
+    updated: int
+    failed: int
+    errors: list[StatementRowError]
+
+
 class PositionMutationResponse(BaseModel):
     message: str
     position: PositionConfig
@@ -115,3 +180,74 @@ class PositionDeleteResponse(BaseModel):
     message: str
     asset_type: AssetType
     code: str
+
+
+class HistoryPoint(BaseModel):
+    timestamp: str
+    price: float
+    change_percent: float | None = None
+
+
+class QuoteHistoryResponse(BaseModel):
+    asset_type: AssetType
+    code: str
+    interval_seconds: int
+    points: list[HistoryPoint]
+
+
+class PortfolioHistoryPoint(BaseModel):
+    timestamp: str
+    market_value: float
+    cost_value: float
+    pnl_amount: float
+    pnl_percent: float
+
+
+class PositionHistorySummary(BaseModel):
+    asset_type: AssetType
+    code: str
+    name: str
+    units: float
+    start_price: float | None = None
+    end_price: float | None = None
+    start_value: float | None = None
+    end_value: float | None = None
+    change_amount: float | None = None
+
+
+class PortfolioHistoryResponse(BaseModel):
+    resolution: Literal["minute", "hour", "day"]
+    points: list[PortfolioHistoryPoint]
+    positions: list[PositionHistorySummary]
+
+
+class PortfolioCreateResponse(BaseModel):
+    message: str
+    id: str
+
+
+class PortfolioListResponse(BaseModel):
+    portfolios: list[str]
+
+
+class PortfolioSummary(BaseModel):
+    id: str
+    status: Literal["ok", "error"]
+    base_currency: str | None = None
+    totals: PortfolioTotals | None = None
+    error: str | None = None
+
+
+class PortfolioAggregateSnapshot(BaseModel):
+    meta: PortfolioMeta
+    totals: PortfolioTotals
+    portfolios: list[PortfolioSummary]
+    positions: list[PositionQuote]
+
+
+class SnapshotPage(BaseModel):
+    meta: PortfolioMeta
+    totals: PortfolioTotals
+    matched: int
+    next_cursor: str | None = None
+    positions: list[dict[str, Any]]
@@ -1,15 +1,36 @@
 import asyncio
+import hashlib
 import json
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Literal
 
-from app.providers import QuoteProvider
+from app.history import QuoteHistoryStore
+from app.metrics import (
+    CONFIG_LOAD_SECONDS,
+    CONFIG_LOCK_HOLD_SECONDS,
+    CONFIG_LOCK_WAIT_SECONDS,
+    CONFIG_SAVE_SECONDS,
+    SNAPSHOT_PHASE_SECONDS,
+)
+from app.paging import PositionRows
+from app.persistence import DebouncedFileWriter, FileLock, FileStamp, read_file_stamp, write_atomic
+from app.pnl import ROLLUP_RESOLUTIONS, PortfolioPnlTracker
+from app.providers import DataProviderError, QuoteProvider, RawQuote
+from app.resilience import quote_deadline
 from app.schemas import (
     FundImportItem,
     FundImportResponse,
     FundImportResult,
+    HistoryPoint,
+    PortfolioHistoryPoint,
+    PortfolioHistoryResponse,
     PositionConfig,
     PositionDeleteResponse,
+    PositionHistorySummary,
     PositionMutationResponse,
     PositionQuote,
     PositionUpdateRequest,
@@ -18,38 +39,356 @@ from app.schemas import (
     PortfolioMeta,
     PortfolioSnapshot,
     PortfolioTotals,
+    PositionBatchOperation,
+    PositionBatchResponse,
+    PositionBatchResult,
+    QuoteHistoryResponse,
+    StatementImportResponse,
+    StatementRowError,
 )
+from app.statements import MAX_STATEMENT_ERRORS, StatementRow, batched
+from app.trading_calendar import MARKET_TZ, parse_quote_time
+from app.valuation import VectorValuation, VectorValuationEngine, numpy_available
+
+MAX_HISTORY_POINTS = 2000
 
 
 class PortfolioService:
-    def __init__(self, config_path: Path, provider: QuoteProvider) -> None:
+    def __init__(
+        self,
+        config_path: Path,
+        provider: QuoteProvider,
+        flush_delay_seconds: float = 0.05,
+        import_concurrency: int = 8,
+        snapshot_budget_seconds: float | None = 5.0,
+        import_budget_seconds: float | None = 10.0,
+        history_store: QuoteHistoryStore | None = None,
+        valuation_engine: Literal["python", "numpy"] = "python",
+        file_lock: FileLock | None = None,
+    ) -> None:
         self._config_path = config_path
+        self._file_lock = file_lock
         self._provider = provider
+        self._import_concurrency = max(1, import_concurrency)
+        self._snapshot_budget_seconds = snapshot_budget_seconds
+        self._import_budget_seconds = import_budget_seconds
+        self._history_store = history_store
+        self._vector_engine = (
+            VectorValuationEngine() if valuation_engine == "numpy" and numpy_available() else None
+        )
+        self._pnl_tracker = PortfolioPnlTracker()
+        self._pnl_tracker_version = -1
+        self._pnl_seeded = history_store is None
+        self._pnl_seed_lock = asyncio.Lock()
+        self._save_listeners: list[Callable[[], None]] = []
+        provider.add_quote_listener(self._track_quote)
         self._config_lock = asyncio.Lock()
+        self._config: PortfolioConfig | None = None
+        self._config_stamp: FileStamp | None = None
+        self._position_index: dict[tuple[str, str], PositionConfig] = {}
+        self._config_version = 0
+        self._snapshot: PortfolioSnapshot | None = None
+        self._snapshot_meta: PortfolioMeta | None = None
+        self._valuation: VectorValuation | None = None
+        self._snapshot_etag = ""
+        self._snapshot_json: bytes | None = None
+        self._restored_snapshot: tuple[PortfolioSnapshot, str, FileStamp] | None = None
+        self._writer = DebouncedFileWriter(
+            config_path, flush_delay_seconds=flush_delay_seconds, on_flushed=self._on_config_flushed
+        )
+
+    @property
+    def provider(self) -> QuoteProvider:
+        return self._provider
+
+    @property
+    def config_version(self) -> int:
+        return self._config_version
+
+    @property
+    def busy(self) -> bool:
+        return self._config_lock.locked() or self._writer.busy
+
+    def add_save_listener(self, listener: Callable[[], None]) -> None:
+        self._save_listeners.append(listener)
+
+    def remove_save_listener(self, listener: Callable[[], None]) -> None:
+        self._save_listeners = [item for item in self._save_listeners if item != listener]
+
+    async def close(self) -> None:
+        self._provider.remove_quote_listener(self._track_quote)
+        await self._writer.drain()
 
     def load_config(self) -> PortfolioConfig:
+        if self._config is not None and self._writer.busy:
+            return self._config
+
+        started_at = time.perf_counter()
+        stamp = read_file_stamp(self._config_path)
+        if self._config is not None and stamp == self._config_stamp:
+            CONFIG_LOAD_SECONDS.observe(time.perf_counter() - started_at, "cached")
+            return self._config
+
         with self._config_path.open("r", encoding="utf-8") as file:
             payload = json.load(file)
-        return PortfolioConfig.model_validate(payload)
+        config = PortfolioConfig.model_validate(payload)
+        self._config = config
+        self._config_stamp = stamp
+        self._config_version += 1
+        self._rebuild_index(config)
+        CONFIG_LOAD_SECONDS.observe(time.perf_counter() - started_at, "reload")
+        return config
+
+    async def save_config(self, config: PortfolioConfig) -> None:
+        if config is not self._config:
+            self._config = config
+            self._rebuild_index(config)
+        self._config_version += 1
+
+        try:
+            with CONFIG_SAVE_SECONDS.time():
+                if self._file_lock is None:
+                    await self._writer.write(lambda: config.model_dump_json(indent=2))
+                else:
+                    body = config.model_dump_json(indent=2)
+                    self._config_stamp = await asyncio.to_thread(write_atomic, self._config_path, body)
+        except Exception:
+            self._config = None
+            raise
+        for listener in self._save_listeners:
+            listener()
+
+    @asynccontextmanager
+    async def _locked(self) -> AsyncIterator[Callable[[PortfolioConfig], None]]:
+        pending: list[PortfolioConfig] = []
+        started_at = time.perf_counter()
+        async with self._config_lock:
+            acquired_at = time.perf_counter()
+            CONFIG_LOCK_WAIT_SECONDS.observe(acquired_at - started_at)
+            try:
+                if self._file_lock is None:
+                    yield pending.append
+                else:
+                    async with self._file_lock.hold():
+                        yield pending.append
+                        if pending:
+                            await self.save_config(pending[-1])
+            finally:
+                CONFIG_LOCK_HOLD_SECONDS.observe(time.perf_counter() - acquired_at)
+
+        if pending and self._file_lock is None:
+            await self.save_config(pending[-1])
 
-    def save_config(self, config: PortfolioConfig) -> None:
-        with self._config_path.open("w", encoding="utf-8") as file:
-            json.dump(config.model_dump(mode="json"), file, ensure_ascii=False, indent=2)
+    def export_snapshot(self) -> tuple[PortfolioSnapshot, str, FileStamp] | None:
+        snapshot = self._materialize_snapshot()
+        if snapshot is None or self._config_stamp is None:
+            return None
+        return snapshot, self._snapshot_etag, self._config_stamp
+
+    def restore_snapshot(self, snapshot: PortfolioSnapshot, etag: str, config_stamp: FileStamp) -> None:
+        if self._snapshot is None:
+            self._restored_snapshot = (snapshot, etag, config_stamp)
 
     async def get_snapshot(self) -> PortfolioSnapshot:
+        if self._restored_snapshot is not None:
+            restored = self._take_restored_snapshot()
+            if restored is not None:
+                return restored
+
+        await self._evaluate()
+        return self._materialize_snapshot()
+
+    async def get_position_rows(self) -> tuple[PositionRows, str]:
+        if self._vector_engine is None or self._restored_snapshot is not None:
+            snapshot = await self.get_snapshot()
+            return PositionRows.from_snapshot(snapshot), self.snapshot_etag(snapshot)
+
+        valuation = await self._evaluate()
+        if self._snapshot is not None:
+            return PositionRows.from_snapshot(self._snapshot), self._snapshot_etag
+        rows = PositionRows(
+            meta=self._snapshot_meta,
+            totals=valuation.totals,
+            count=len(valuation),
+            column=valuation.column,
+            rows=valuation.rows,
+        )
+        return rows, self._snapshot_etag
+
+    async def _evaluate(self) -> VectorValuation | None:
+        started_at = time.perf_counter()
         config = self.load_config()
-        tasks = [self._evaluate_position(position) for position in config.positions]
-        positions = await asyncio.gather(*tasks)
-        totals = self._compute_totals(positions)
+        config_version = self._config_version
+        held_positions = list(config.positions)
+        with quote_deadline(self._snapshot_budget_seconds):
+            quotes = await self._fetch_position_quotes(held_positions)
+        fetched_at = time.perf_counter()
+        SNAPSHOT_PHASE_SECONDS.observe(fetched_at - started_at, "fetch")
+        position_quotes = [
+            quotes[position.asset_type].get(position.code.strip()) for position in held_positions
+        ]
+        etag = self._fingerprint(held_positions, position_quotes)
+        if (self._snapshot is not None or self._valuation is not None) and etag == self._snapshot_etag:
+            SNAPSHOT_PHASE_SECONDS.observe(time.perf_counter() - started_at, "total")
+            return self._valuation
+
         meta = PortfolioMeta(
             base_currency=config.base_currency,
             refresh_seconds=config.refresh_seconds,
             updated_at=datetime.now().isoformat(timespec="seconds"),
         )
-        return PortfolioSnapshot(meta=meta, totals=totals, positions=positions)
+        if self._vector_engine:
+            self._valuation = self._vector_engine.evaluate(config_version, held_positions, position_quotes)
+            self._snapshot = None
+        else:
+            positions = [
+                self._evaluate_position(position, raw_quote)
+                for position, raw_quote in zip(held_positions, position_quotes)
+            ]
+            self._valuation = None
+            self._snapshot = PortfolioSnapshot(
+                meta=meta, totals=self._compute_totals(positions), positions=positions
+            )
+        self._snapshot_meta = meta
+        self._snapshot_etag = etag
+        self._snapshot_json = None
+        finished_at = time.perf_counter()
+        SNAPSHOT_PHASE_SECONDS.observe(finished_at - fetched_at, "valuation")
+        SNAPSHOT_PHASE_SECONDS.observe(finished_at - started_at, "total")
+        return self._valuation
 
-    async def import_fund_items(self, items: list[FundImportItem]) -> FundImportResponse:
-        async with self._config_lock:
+    def _materialize_snapshot(self) -> PortfolioSnapshot | None:
+        if self._snapshot is None and self._valuation is not None:
+            with SNAPSHOT_PHASE_SECONDS.time("materialize"):
+                self._snapshot = PortfolioSnapshot(
+                    meta=self._snapshot_meta, totals=self._valuation.totals, positions=self._valuation.rows()
+                )
+        return self._snapshot
+
+    def _take_restored_snapshot(self) -> PortfolioSnapshot | None:
+        snapshot, etag, config_stamp = self._restored_snapshot
+        self._restored_snapshot = None
+        self.load_config()
+        if self._snapshot is not None or config_stamp != self._config_stamp:
+            return None
+        self._snapshot = snapshot
+        self._snapshot_etag = etag
+        self._snapshot_json = None
+        return snapshot
+
+    def snapshot_json(self, snapshot: PortfolioSnapshot) -> bytes:
+        if snapshot is self._snapshot and self._snapshot_json is not None:
+            return self._snapshot_json
+        with SNAPSHOT_PHASE_SECONDS.time("serialization"):
+            body = snapshot.model_dump_json().encode("utf-8")
+        if snapshot is self._snapshot:
+            self._snapshot_json = body
+        return body
+
+    def snapshot_etag(self, snapshot: PortfolioSnapshot) -> str:
+        if snapshot is self._snapshot:
+            return self._snapshot_etag
+        digest = hashlib.blake2b(snapshot.model_dump_json(exclude={"meta"}).encode("utf-8"), digest_size=16)
+        return f'"{digest.hexdigest()}"'
+
+    async def get_quote_history(
+        self, asset_type: str, code: str, start: datetime, end: datetime, interval_seconds: int
+    ) -> QuoteHistoryResponse:
+        if not self._history_store:
+            raise LookupError("未启用行情历史存储")
+
+        normalized_code = self._normalize_code(asset_type, code)
+        records = await self._history_store.query(
+            asset_type,
+            normalized_code,
+            int(self._as_market_time(start).timestamp()),
+            int(self._as_market_time(end).timestamp()),
+            interval_seconds,
+        )
+        return QuoteHistoryResponse(
+            asset_type=asset_type,
+            code=normalized_code,
+            interval_seconds=interval_seconds,
+            points=[
+                HistoryPoint(
+                    timestamp=datetime.fromtimestamp(record.timestamp, MARKET_TZ).isoformat(),
+                    price=round(record.price, 4),
+                    change_percent=round(record.change_percent, 2)
+                    if record.change_percent is not None
+                    else None,
+                )
+                for record in records
+            ],
+        )
+
+    async def get_portfolio_history(
+        self, start: datetime, end: datetime, resolution: str = "auto"
+    ) -> PortfolioHistoryResponse:
+        self.load_config()
+        await self._seed_pnl_tracker()
+        self._sync_pnl_tracker()
+        start_ts = int(self._as_market_time(start).timestamp())
+        end_ts = int(self._as_market_time(end).timestamp())
+        if resolution == "auto":
+            span = max(0, end_ts - start_ts)
+            resolution = next(
+                (
+                    name
+                    for name, (seconds, _) in ROLLUP_RESOLUTIONS.items()
+                    if span / seconds <= MAX_HISTORY_POINTS
+                ),
+                "day",
+            )
+
+        points = []
+        for point in self._pnl_tracker.points(resolution, start_ts, end_ts):
+            pnl_amount = round(point.market_value - point.cost_value, 2)
+            points.append(
+                PortfolioHistoryPoint(
+                    timestamp=datetime.fromtimestamp(point.bucket, MARKET_TZ).isoformat(),
+                    market_value=round(point.market_value, 2),
+                    cost_value=round(point.cost_value, 2),
+                    pnl_amount=pnl_amount,
+                    pnl_percent=round(pnl_amount / point.cost_value * 100, 2) if point.cost_value > 0 else 0.0,
+                )
+            )
+
+        boundaries = {}
+        if self._history_store:
+            boundaries = await self._history_store.boundaries(
+                list(self._position_index), start_ts, end_ts
+            )
+
+        positions = []
+        for key, position in self._position_index.items():
+            boundary = boundaries.get(key)
+            summary = PositionHistorySummary(
+                asset_type=position.asset_type,
+                code=key[1],
+                name=position.name or key[1],
+                units=position.units,
+            )
+            if boundary:
+                first, last = boundary
+                summary.start_price = round(first.price, 4)
+                summary.end_price = round(last.price, 4)
+                summary.start_value = round(position.units * first.price, 2)
+                summary.end_value = round(position.units * last.price, 2)
+                summary.change_amount = round(summary.end_value - summary.start_value, 2)
+            positions.append(summary)
+
+        return PortfolioHistoryResponse(resolution=resolution, points=points, positions=positions)
+
+    async def import_fund_items(
+        self,
+        items: list[FundImportItem],
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> FundImportResponse:
+        quotes = await self._prefetch_quotes(
+            "fund", [self._normalize_code("fund", item.code) for item in items], on_progress
+        )
+
+        async with self._locked() as save:
             config = self.load_config()
             results: list[FundImportResult] = []
             has_changes = False
@@ -62,7 +401,9 @@ class PortfolioService:
                 normalized_code = self._normalize_code("fund", code)
 
                 try:
-                    quote = await self._provider.get_quote("fund", normalized_code)
+                    quote = quotes[normalized_code]
+                    if isinstance(quote, Exception):
+                        raise quote
                     if quote.price <= 0:
                         raise ValueError("基金净值无效")
 
@@ -71,49 +412,33 @@ class PortfolioService:
                     if imported_units <= 0:
                         raise ValueError("持仓金额过小，无法换算为有效份额")
 
-                    existing_position = self._find_position(config, "fund", normalized_code)
                     display_name = item.name or quote.name or normalized_code
-
-                    if existing_position:
-                        previous_cost = existing_position.units * existing_position.cost_price
-                        total_cost = previous_cost + import_amount
-                        total_units = round(existing_position.units + imported_units, 4)
-                        existing_position.units = total_units
-                        existing_position.cost_price = round(total_cost / total_units, 6)
-                        if item.name:
-                            existing_position.name = item.name
-                        results.append(
-                            FundImportResult(
-                                code=normalized_code,
-                                name=display_name,
-                                amount=import_amount,
-                                units=imported_units,
-                                cost_price=round(quote.price, 6),
-                                status="updated",
-                            )
-                        )
-                        updated += 1
-                    else:
-                        config.positions.append(
-                            PositionConfig(
-                                asset_type="fund",
-                                code=normalized_code,
-                                name=display_name,
-                                units=imported_units,
-                                cost_price=round(quote.price, 6),
-                            )
-                        )
-                        results.append(
-                            FundImportResult(
-                                code=normalized_code,
-                                name=display_name,
-                                amount=import_amount,
-                                units=imported_units,
-                                cost_price=round(quote.price, 6),
-                                status="added",
-                            )
+                    status = self._merge_position(
+                        config,
+                        PositionConfig(
+                            asset_type="fund",
+                            code=normalized_code,
+                            name=display_name,
+                            units=imported_units,
+                            cost_price=round(quote.price, 6),
+                        ),
+                        import_amount,
+                        rename=bool(item.name),
+                    )
+                    results.append(
+                        FundImportResult(
+                            code=normalized_code,
+                            name=display_name,
+                            amount=import_amount,
+                            units=imported_units,
+                            cost_price=round(quote.price, 6),
+                            status=status,
                         )
+                    )
+                    if status == "added":
                         added += 1
+                    else:
+                        updated += 1
 
                     has_changes = True
                 except Exception as error:
@@ -128,21 +453,147 @@ class PortfolioService:
                     )
 
             if has_changes:
-                self.save_config(config)
+                save(config)
 
-            return FundImportResponse(
-                added=added,
-                updated=updated,
-                failed=failed,
-                items=results,
-            )
+        return FundImportResponse(
+            added=added,
+            updated=updated,
+            failed=failed,
+            items=results,
+        )
+
+    async def import_statement(
+        self,
+        rows: AsyncIterator[StatementRow | StatementRowError],
+        on_progress: Callable[[int, int], None] | None = None,
+        chunk_size: int = 500,
+    ) -> StatementImportResponse:
+        staged: dict[tuple[str, str], tuple[int, str, bool, float, float]] = {}
+        errors: list[StatementRowError] = []
+        total = 0
+        failed = 0
+
+        def fail(error: StatementRowError) -> None:
+            nonlocal failed
+            failed += 1
+            if len(errors) < MAX_STATEMENT_ERRORS:
+                errors.append(error)
+
+        async for chunk in batched(rows, chunk_size):
+            total += len(chunk)
+            parsed: list[tuple[StatementRow, str]] = []
+            codes_by_type: dict[str, list[str]] = {}
+            for row in chunk:
+                if isinstance(row, StatementRowError):
+                    fail(row)
+                    continue
+                normalized_code = self._normalize_code(row.asset_type, row.code)
+                parsed.append((row, normalized_code))
+                if not row.name or row.units is None or (row.cost_price is None and row.amount is None):
+                    codes_by_type.setdefault(row.asset_type, []).append(normalized_code)
+
+            asset_types = list(codes_by_type)
+            with quote_deadline(self._import_budget_seconds):
+                fetched = await asyncio.gather(
+                    *(
+                        self._provider.get_quotes(asset_type, codes_by_type[asset_type])
+                        for asset_type in asset_types
+                    )
+                )
+            quotes = dict(zip(asset_types, fetched))
+            for row, normalized_code in parsed:
+                quote = quotes.get(row.asset_type, {}).get(normalized_code)
+                try:
+                    units, cost_amount = self._statement_holding(row, quote)
+                except ValueError as error:
+                    fail(StatementRowError(line=row.line, code=normalized_code, error=str(error)))
+                    continue
+                key = (row.asset_type, normalized_code)
+                name = row.name or (quote.name if isinstance(quote, RawQuote) else None) or normalized_code
+                previous = staged.get(key)
+                if previous is None:
+                    staged[key] = (row.line, name, bool(row.name), units, cost_amount)
+                else:
+                    line, staged_name, named, staged_units, staged_cost = previous
+                    staged[key] = (
+                        line,
+                        staged_name if named or not row.name else row.name,
+                        named or bool(row.name),
+                        staged_units + units,
+                        staged_cost + cost_amount,
+                    )
+            if on_progress:
+                on_progress(total, failed)
+
+        added = 0
+        updated = 0
+        async with self._locked() as save:
+            config = self.load_config()
+            for (asset_type, code), (line, name, named, units, cost_amount) in staged.items():
+                try:
+                    position = PositionConfig(
+                        asset_type=asset_type,
+                        code=code,
+                        name=name[:50],
+                        units=round(units, 4),
+                        cost_price=round(cost_amount / units, 6),
+                    )
+                except ValueError as error:
+                    fail(StatementRowError(line=line, code=code, error=str(error)))
+                    continue
+                if self._merge_position(config, position, cost_amount, rename=named) == "added":
+                    added += 1
+                else:
+                    updated += 1
+            if added or updated:
+                save(config)
+
+        return StatementImportResponse(
+            rows=total,
+            added=added,
+            updated=updated,
+            failed=failed,
+            errors=errors,
+        )
+
+    def _statement_holding(
+        self, row: StatementRow, quote: RawQuote | DataProviderError | None
+    ) -> tuple[float, float]:
+        if row.units is not None and row.cost_price is not None:
+            return row.units, row.units * row.cost_price
+        if row.units is not None and row.amount is not None:
+            return row.units, row.amount
+        if not isinstance(quote, RawQuote):
+            raise ValueError(str(quote) if quote else "未获取到行情")
+        if quote.price <= 0:
+            raise ValueError("行情价格无效")
+        if row.units is not None:
+            return row.units, row.units * quote.price
+        units = round(row.amount / quote.price, 4)
+        if units <= 0:
+            raise ValueError("持仓金额过小，无法换算为有效份额")
+        return units, row.amount
+
+    def _merge_position(
+        self, config: PortfolioConfig, position: PositionConfig, cost_amount: float, rename: bool
+    ) -> Literal["added", "updated"]:
+        existing = self._find_position(position.asset_type, position.code)
+        if existing is None:
+            self._append_position(config, position)
+            return "added"
+        total_units = round(existing.units + position.units, 4)
+        existing.cost_price = round((existing.units * existing.cost_price + cost_amount) / total_units, 6)
+        existing.units = total_units
+        if rename:
+            existing.name = position.name
+        return "updated"
 
     async def add_position(self, payload: PositionUpsertRequest) -> PositionMutationResponse:
-        async with self._config_lock:
+        async with self._locked() as save:
             config = self.load_config()
             normalized_code = self._normalize_code(payload.asset_type, payload.code)
 
-            if self._find_position(config, payload.asset_type, normalized_code):
+            if self._find_position(payload.asset_type, normalized_code):
                 raise ValueError(f"{payload.asset_type}:{normalized_code} 已存在")
 
             display_name = payload.name
@@ -160,17 +611,18 @@ class PortfolioService:
                 units=round(payload.units, 4),
                 cost_price=round(payload.cost_price, 6),
             )
-            config.positions.append(position)
-            self.save_config(config)
-            return PositionMutationResponse(message="新增持仓成功", position=position)
+            self._append_position(config, position)
+            save(config)
+
+        return PositionMutationResponse(message="新增持仓成功", position=position)
 
     async def update_position(
         self, asset_type: str, code: str, payload: PositionUpdateRequest
     ) -> PositionMutationResponse:
-        async with self._config_lock:
+        async with self._locked() as save:
             config = self.load_config()
             normalized_code = self._normalize_code(asset_type, code)
-            position = self._find_position(config, asset_type, normalized_code)
+            position = self._find_position(asset_type, normalized_code)
             if not position:
                 raise LookupError(f"{asset_type}:{normalized_code} 不存在")
 
@@ -181,62 +633,181 @@ class PortfolioService:
                 position.units = round(payload.units, 4)
             if payload.cost_price is not None:
                 position.cost_price = round(payload.cost_price, 6)
+            save(config)
 
-            self.save_config(config)
-            return PositionMutationResponse(message="修改持仓成功", position=position)
+        return PositionMutationResponse(message="修改持仓成功", position=position)
 
     async def delete_position(self, asset_type: str, code: str) -> PositionDeleteResponse:
-        async with self._config_lock:
+        async with self._locked() as save:
             config = self.load_config()
             normalized_code = self._normalize_code(asset_type, code)
-            target_index = next(
-                (
-                    index
-                    for index, position in enumerate(config.positions)
-                    if position.asset_type == asset_type
-                    and self._normalize_code(position.asset_type, position.code) == normalized_code
-                ),
-                None,
-            )
-            if target_index is None:
+            position = self._find_position(asset_type, normalized_code)
+            if not position:
                 raise LookupError(f"{asset_type}:{normalized_code} 不存在")
 
+            target_index = next(
+                index for index, candidate in enumerate(config.positions) if candidate is position
+            )
             config.positions.pop(target_index)
-            self.save_config(config)
-            return PositionDeleteResponse(
-                message="删除持仓成功",
-                asset_type=asset_type,
+            del self._position_index[(asset_type, normalized_code)]
+            save(config)
+
+        return PositionDeleteResponse(
+            message="删除持仓成功",
+            asset_type=asset_type,
+            code=normalized_code,
+        )
+
+    async def apply_position_batch(self, operations: list[PositionBatchOperation]) -> PositionBatchResponse:
+        self.load_config()
+        deleted_keys: set[tuple[str, str]] = set()
+        lookups: dict[str, list[str]] = {}
+        for operation in operations:
+            normalized_code = self._normalize_code(operation.asset_type, operation.code)
+            if operation.op == "delete":
+                deleted_keys.add((operation.asset_type, normalized_code))
+            elif operation.op == "upsert" and not operation.name:
+                if (operation.asset_type, normalized_code) in deleted_keys or not self._find_position(
+                    operation.asset_type, normalized_code
+                ):
+                    lookups.setdefault(operation.asset_type, []).append(normalized_code)
+        fetched = await asyncio.gather(
+            *(self._prefetch_quotes(asset_type, codes) for asset_type, codes in lookups.items())
+        )
+        names = {
+            (asset_type, code): quote.name
+            for asset_type, quotes in zip(lookups, fetched)
+            for code, quote in quotes.items()
+            if isinstance(quote, RawQuote)
+        }
+
+        async with self._locked() as save:
+            config = self.load_config()
+            removed: set[int] = set()
+            results: list[PositionBatchResult] = []
+            for operation in operations:
+                normalized_code = self._normalize_code(operation.asset_type, operation.code)
+                try:
+                    status, position = self._apply_batch_operation(
+                        config, operation, normalized_code, names, removed
+                    )
+                except (LookupError, ValueError) as error:
+                    results.append(
+                        PositionBatchResult(
+                            op=operation.op,
+                            asset_type=operation.asset_type,
+                            code=normalized_code,
+                            status="failed",
+                            error=str(error),
+                        )
+                    )
+                    continue
+                results.append(
+                    PositionBatchResult(
+                        op=operation.op,
+                        asset_type=operation.asset_type,
+                        code=normalized_code,
+                        status=status,
+                        position=position,
+                    )
+                )
+
+            if removed:
+                config.positions = [position for position in config.positions if id(position) not in removed]
+            if any(result.status != "failed" for result in results):
+                save(config)
+
+        counts = {status: 0 for status in ("added", "updated", "deleted", "failed")}
+        for result in results:
+            counts[result.status] += 1
+
+        return PositionBatchResponse(**counts, items=results)
+
+    def _apply_batch_operation(
+        self,
+        config: PortfolioConfig,
+        operation: PositionBatchOperation,
+        normalized_code: str,
+        names: dict[tuple[str, str], str],
+        removed: set[int],
+    ) -> tuple[str, PositionConfig | None]:
+        key = (operation.asset_type, normalized_code)
+        position = self._find_position(*key)
+
+        if operation.op == "delete":
+            if not position:
+                raise LookupError(f"{operation.asset_type}:{normalized_code} 不存在")
+            removed.add(id(position))
+            del self._position_index[key]
+            return "deleted", None
+
+        if operation.op == "upsert" and not position:
+            position = PositionConfig(
+                asset_type=operation.asset_type,
                 code=normalized_code,
+                name=operation.name or names.get(key) or normalized_code,
+                units=round(operation.units, 4),
+                cost_price=round(operation.cost_price, 6),
             )
+            self._append_position(config, position)
+            return "added", position
+
+        if not position:
+            raise LookupError(f"{operation.asset_type}:{normalized_code} 不存在")
+        if operation.name is not None:
+            position.name = operation.name.strip() or None
+        if operation.units is not None:
+            position.units = round(operation.units, 4)
+        if operation.cost_price is not None:
+            position.cost_price = round(operation.cost_price, 6)
+        return "updated", position
+
+    async def _prefetch_quotes(
+        self,
+        asset_type: str,
+        codes: list[str],
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> dict[str, RawQuote | Exception]:
+        unique_codes = list(dict.fromkeys(codes))
+        semaphore = asyncio.Semaphore(self._import_concurrency)
+        completed = 0
 
-    async def _evaluate_position(self, position: PositionConfig) -> PositionQuote:
+        async def fetch(code: str) -> RawQuote | Exception:
+            nonlocal completed
+            async with semaphore:
+                try:
+                    return await self._provider.get_quote(asset_type, code)
+                except Exception as error:
+                    return error
+                finally:
+                    completed += 1
+                    if on_progress:
+                        on_progress(completed, len(unique_codes))
+
+        with quote_deadline(self._import_budget_seconds):
+            fetched = await asyncio.gather(*(fetch(code) for code in unique_codes))
+        return dict(zip(unique_codes, fetched))
+
+    async def _fetch_position_quotes(
+        self, positions: list[PositionConfig]
+    ) -> dict[str, dict[str, RawQuote | DataProviderError]]:
+        codes_by_type: dict[str, list[str]] = {}
+        for position in positions:
+            codes_by_type.setdefault(position.asset_type, []).append(position.code)
+
+        asset_types = list(codes_by_type)
+        fetched = await asyncio.gather(
+            *(self._provider.get_quotes(asset_type, codes_by_type[asset_type]) for asset_type in asset_types)
+        )
+        return dict(zip(asset_types, fetched))
+
+    def _evaluate_position(
+        self, position: PositionConfig, raw_quote: RawQuote | DataProviderError | None
+    ) -> PositionQuote:
         display_name = position.name or position.code
         cost_value = round(position.units * position.cost_price, 2)
 
-        try:
-            raw_quote = await self._provider.get_quote(position.asset_type, position.code)
-            market_value = round(position.units * raw_quote.price, 2)
-            pnl_amount = round(market_value - cost_value, 2)
-            pnl_percent = round((pnl_amount / cost_value * 100), 2) if cost_value > 0 else 0.0
-            return PositionQuote(
-                asset_type=position.asset_type,
-                code=raw_quote.code,
-                name=position.name or raw_quote.name or display_name,
-                units=position.units,
-                cost_price=position.cost_price,
-                current_price=round(raw_quote.price, 4),
-                change_percent=round(raw_quote.change_percent, 2)
-                if raw_quote.change_percent is not None
-                else None,
-                market_value=market_value,
-                cost_value=cost_value,
-                pnl_amount=pnl_amount,
-                pnl_percent=pnl_percent,
-                source=raw_quote.source,
-                quote_time=raw_quote.quote_time,
-                status="ok",
-            )
-        except Exception as error:
+        if not isinstance(raw_quote, RawQuote):
             return PositionQuote(
                 asset_type=position.asset_type,
                 code=position.code,
@@ -245,9 +816,32 @@ class PortfolioService:
                 cost_price=position.cost_price,
                 cost_value=cost_value,
                 status="error",
-                error=str(error),
+                error=str(raw_quote) if raw_quote else "行情数据缺失",
             )
 
+        market_value = round(position.units * raw_quote.price, 2)
+        pnl_amount = round(market_value - cost_value, 2)
+        pnl_percent = round((pnl_amount / cost_value * 100), 2) if cost_value > 0 else 0.0
+        return PositionQuote(
+            asset_type=position.asset_type,
+            code=raw_quote.code,
+            name=position.name or raw_quote.name or display_name,
+            units=position.units,
+            cost_price=position.cost_price,
+            current_price=round(raw_quote.price, 4),
+            change_percent=round(raw_quote.change_percent, 2)
+            if raw_quote.change_percent is not None
+            else None,
+            market_value=market_value,
+            cost_value=cost_value,
+            pnl_amount=pnl_amount,
+            pnl_percent=pnl_percent,
+            source=raw_quote.source,
+            quote_time=raw_quote.quote_time,
+            stale=raw_quote.stale,
+            status="ok",
+        )
+
     def _compute_totals(self, positions: list[PositionQuote]) -> PortfolioTotals:
         total_cost = round(sum(item.cost_value for item in positions), 2)
         total_market_value = round(
@@ -266,21 +860,82 @@ class PortfolioService:
             failed_positions=failed_positions,
         )
 
+    def _fingerprint(
+        self,
+        positions: list[PositionConfig],
+        quotes: list[RawQuote | DataProviderError | None],
+    ) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self._config_path}|{self._config_version}".encode("utf-8"))
+        for position, quote in zip(positions, quotes):
+            if isinstance(quote, RawQuote):
+                fields = (quote.price, quote.change_percent, quote.quote_time, quote.name, quote.source, quote.stale)
+            else:
+                fields = ("!", quote)
+            digest.update(f"\n{position.asset_type}:{position.code}|{fields!r}".encode("utf-8"))
+        return f'"{digest.hexdigest()}"'
+
     def _normalize_code(self, asset_type: str, code: str) -> str:
         value = code.strip()
         if asset_type == "stock":
             return self._provider.normalize_stock_code(value)
         return value
 
-    def _find_position(
-        self, config: PortfolioConfig, asset_type: str, code: str
-    ) -> PositionConfig | None:
-        return next(
-            (
-                position
-                for position in config.positions
-                if position.asset_type == asset_type
-                and self._normalize_code(position.asset_type, position.code) == code
-            ),
-            None,
-        )
+    def _find_position(self, asset_type: str, code: str) -> PositionConfig | None:
+        return self._position_index.get((asset_type, code))
+
+    def _append_position(self, config: PortfolioConfig, position: PositionConfig) -> None:
+        config.positions.append(position)
+        self._position_index.setdefault((position.asset_type, position.code), position)
+
+    def _rebuild_index(self, config: PortfolioConfig) -> None:
+        index: dict[tuple[str, str], PositionConfig] = {}
+        for position in config.positions:
+            key = (position.asset_type, self._normalize_code(position.asset_type, position.code))
+            index.setdefault(key, position)
+        self._position_index = index
+
+    def _track_quote(self, asset_type: str, quote: RawQuote) -> None:
+        if self._config is None:
+            return
+        self._sync_pnl_tracker()
+        quoted_at = parse_quote_time(quote.quote_time)
+        timestamp = int(quoted_at.timestamp()) if quoted_at else int(time.time())
+        self._pnl_tracker.apply_quote((asset_type, quote.code), quote.price, timestamp)
+
+    async def _seed_pnl_tracker(self) -> None:
+        async with self._pnl_seed_lock:
+            if self._pnl_seeded:
+                return
+            version = self._config_version
+            positions = dict(self._position_index)
+            now = int(time.time())
+            windows = []
+            window_end = now
+            for seconds, retention in ROLLUP_RESOLUTIONS.values():
+                window_start = now - seconds * retention
+                if window_start < window_end:
+                    windows.append((window_start, window_end, seconds))
+                    window_end = window_start - 1
+            events = await self._history_store.replay(list(positions), windows)
+
+            tracker = PortfolioPnlTracker()
+            tracker.sync(positions)
+            for timestamp, key, price in events:
+                tracker.apply_quote(key, price, timestamp)
+            self._pnl_tracker = tracker
+            self._pnl_tracker_version = version
+            self._pnl_seeded = True
+
+    def _sync_pnl_tracker(self) -> None:
+        if self._pnl_tracker_version != self._config_version:
+            self._pnl_tracker.sync(self._position_index)
+            self._pnl_tracker_version = self._config_version
+
+    def _as_market_time(self, moment: datetime) -> datetime:
+        if moment.tzinfo is None:
+            return moment.replace(tzinfo=MARKET_TZ)
+        return moment
+
+    def _on_config_flushed(self, stamp: FileStamp) -> None:
+        self._config_stamp = stamp
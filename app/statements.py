@@ -0,0 +1,239 @@
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from app.schemas import AssetType, StatementField, StatementRowError, StatementSchema
+
+STOCK_CODE_PREFIXES = ("sh", "sz", "bj", "hk", "us")
+MAX_STATEMENT_ERRORS = 200
+MAX_HEADER_SCAN_LINES = 20
+
+DEFAULT_STATEMENT_COLUMNS: dict[StatementField, list[str]] = {
+    "asset_type": ["asset_type", "类型", "资产类型", "品种", "证券类别"],
+    "code": ["code", "代码", "证券代码", "基金代码", "股票代码"],
+    "name": ["name", "名称", "证券名称", "基金名称", "股票名称"],
+    "units": ["units", "数量", "持仓数量", "证券数量", "股份余额", "持有份额", "份额"],
+    "cost_price": ["cost_price", "成本价", "参考成本价", "持仓成本价", "单位成本"],
+    "amount": ["amount", "金额", "持仓金额", "投入金额", "买入金额", "持仓成本"],
+}
+DEFAULT_ASSET_TYPE_VALUES: dict[str, AssetType] = {
+    "fund": "fund",
+    "stock": "stock",
+    "基金": "fund",
+    "股票": "stock",
+    "a股": "stock",
+}
+
+BUILTIN_STATEMENT_SCHEMAS = {
+    "default": StatementSchema(),
+    "broker": StatementSchema(delimiter="\t", default_asset_type="stock"),
+    "fund_platform": StatementSchema(default_asset_type="fund"),
+}
+
+
+@dataclass
+class StatementRow:
+    line: int
+    asset_type: AssetType
+    code: str
+    name: str | None
+    units: float | None
+    cost_price: float | None
+    amount: float | None
+
+
+def load_statement_schemas(path: Path) -> dict[str, StatementSchema]:
+    schemas = dict(BUILTIN_STATEMENT_SCHEMAS)
+    if not path.exists():
+        return schemas
+    with path.open("r", encoding="utf-8") as file:
+        payload = json.load(file)
+    try:
+        schemas.update({name: StatementSchema.model_validate(value) for name, value in payload.items()})
+    except (AttributeError, ValidationError) as error:
+        raise ValueError(f"对账单格式配置错误: {path}") from error
+    return schemas
+
+
+def resolve_statement_schema(
+    schemas: dict[str, StatementSchema],
+    name: str,
+    delimiter: str | None = None,
+    encoding: str | None = None,
+) -> StatementSchema:
+    schema = schemas.get(name)
+    if schema is None:
+        raise ValueError(f"未知的对账单格式: {name}")
+    overrides: dict[str, str] = {}
+    if delimiter:
+        overrides["delimiter"] = "\t" if delimiter.lower() in ("tab", "tsv", "\\t") else delimiter
+    if encoding:
+        overrides["encoding"] = encoding
+    if overrides:
+        schema = StatementSchema.model_validate({**schema.model_dump(), **overrides})
+    try:
+        codecs.lookup(schema.encoding)
+    except LookupError as error:
+        raise ValueError(f"不支持的文件编码: {schema.encoding}") from error
+    return schema
+
+
+def clean_cell(value: str) -> str:
+    value = value.strip()
+    if value.startswith("="):
+        value = value[1:]
+    return value.strip('"').strip()
+
+
+def parse_number(value: str) -> float | None:
+    cleaned = value.replace(",", "").replace("¥", "").replace("￥", "").strip()
+    if cleaned in ("", "-", "--"):
+        return None
+    return float(cleaned)
+
+
+class StatementReader:
+    def __init__(self, chunks: AsyncIterator[bytes], schema: StatementSchema) -> None:
+        self._schema = schema
+        self._batches = self._line_batches(chunks)
+        self._pending: list[str] = []
+        self._line_number = 0
+        self._indexes: dict[str, int] = {}
+        self._asset_type_values = {
+            **DEFAULT_ASSET_TYPE_VALUES,
+            **{key.lower(): value for key, value in schema.asset_type_values.items()},
+        }
+        self.bytes_read = 0
+
+    async def read_header(self) -> list[str]:
+        scanned = 0
+        while scanned < MAX_HEADER_SCAN_LINES:
+            line = await self._next_line()
+            if line is None:
+                break
+            if self._line_number <= self._schema.skip_rows or not line.strip():
+                continue
+            scanned += 1
+            header = [clean_cell(cell) for cell in next(csv.reader([line], delimiter=self._schema.delimiter))]
+            indexes = self._match_columns(header)
+            if "code" not in indexes:
+                continue
+            if "units" not in indexes and "amount" not in indexes:
+                raise ValueError("表头缺少数量或金额列")
+            self._indexes = indexes
+            return header
+        raise ValueError("未找到包含代码列的表头")
+
+    def _match_columns(self, header: list[str]) -> dict[str, int]:
+        positions: dict[str, int] = {}
+        for index, title in enumerate(header):
+            positions.setdefault(title.lower(), index)
+        indexes: dict[str, int] = {}
+        for field_name, aliases in {**DEFAULT_STATEMENT_COLUMNS, **self._schema.columns}.items():
+            index = next((positions[alias.lower()] for alias in aliases if alias.lower() in positions), None)
+            if index is not None:
+                indexes[field_name] = index
+        return indexes
+
+    async def rows(self) -> AsyncIterator[StatementRow | StatementRowError]:
+        pending, self._pending = self._pending, []
+        if pending:
+            for row in self._parse_lines(pending):
+                yield row
+        async for lines in self._batches:
+            for row in self._parse_lines(lines):
+                yield row
+
+    def _parse_lines(self, lines: list[str]) -> list[StatementRow | StatementRowError]:
+        offset = self._line_number
+        reader = csv.reader(lines, delimiter=self._schema.delimiter)
+        try:
+            rows = [
+                self._parse_row(offset + reader.line_num, cells)
+                for cells in reader
+                if any(cell.strip() for cell in cells)
+            ]
+        except csv.Error as error:
+            raise ValueError(f"对账单第 {offset + reader.line_num} 行解析失败: {error}") from error
+        self._line_number = offset + len(lines)
+        return rows
+
+    def _parse_row(self, line: int, cells: list[str]) -> StatementRow | StatementRowError:
+        values = {
+            field_name: clean_cell(cells[index]) if index < len(cells) else ""
+            for field_name, index in self._indexes.items()
+        }
+        code = values["code"]
+        if not code:
+            return StatementRowError(line=line, error="代码为空")
+
+        try:
+            units = parse_number(values.get("units", ""))
+            cost_price = parse_number(values.get("cost_price", ""))
+            amount = parse_number(values.get("amount", ""))
+        except ValueError:
+            return StatementRowError(line=line, code=code, error="数值格式错误")
+        if units is None and amount is None:
+            return StatementRowError(line=line, code=code, error="缺少数量或金额")
+        if any(value is not None and value <= 0 for value in (units, cost_price, amount)):
+            return StatementRowError(line=line, code=code, error="数量、成本价和金额必须大于 0")
+
+        raw_type = values.get("asset_type", "").lower()
+        if raw_type:
+            asset_type = self._asset_type_values.get(raw_type)
+            if asset_type is None:
+                return StatementRowError(line=line, code=code, error=f"无法识别的资产类型: {raw_type}")
+        elif code.lower().startswith(STOCK_CODE_PREFIXES):
+            asset_type = "stock"
+        else:
+            asset_type = self._schema.default_asset_type
+
+        return StatementRow(
+            line=line,
+            asset_type=asset_type,
+            code=code,
+            name=values.get("name") or None,
+            units=units,
+            cost_price=cost_price,
+            amount=amount,
+        )
+
+    async def _next_line(self) -> str | None:
+        while not self._pending:
+            lines = await anext(self._batches, None)
+            if lines is None:
+                return None
+            self._pending = lines
+        self._line_number += 1
+        return self._pending.pop(0)
+
+    async def _line_batches(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[list[str]]:
+        decoder = codecs.getincrementaldecoder(self._schema.encoding)()
+        tail = ""
+        async for chunk in chunks:
+            self.bytes_read += len(chunk)
+            lines = (tail + decoder.decode(chunk)).splitlines(keepends=True)
+            tail = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+            if lines:
+                yield lines
+        rest = tail + decoder.decode(b"", final=True)
+        if rest:
+            yield rest.splitlines(keepends=True)
+
+
+async def batched(
+    rows: AsyncIterator[StatementRow | StatementRowError], size: int
+) -> AsyncIterator[list[StatementRow | StatementRowError]]:
+    chunk: list[StatementRow | StatementRowError] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+import anyio
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.types import Receive
+
+from app.refresher import SnapshotRefresher
+from app.schemas import FundImportItem, PortfolioSnapshot, PositionQuote
+from app.service import PortfolioService
+from app.statements import StatementReader
+
+logger = logging.getLogger(__name__)
+
+def position_key(position: PositionQuote) -> str:
+    return f"{position.asset_type}:{position.code}"
+
+
+def diff_snapshots(previous: PortfolioSnapshot, current: PortfolioSnapshot) -> dict[str, Any] | None:
+    previous_positions = {position_key(position): position for position in previous.positions}
+    current_keys = [position_key(position) for position in current.positions]
+    current_key_set = set(current_keys)
+
+    upserts = []
+    changes = []
+    for key, position in zip(current_keys, current.positions):
+        known = previous_positions.get(key)
+        if known is None:
+            upserts.append(position.model_dump(mode="json"))
+        elif known != position:
+            changed = {
+                field for field in PositionQuote.model_fields if getattr(known, field) != getattr(position, field)
+            }
+            changes.append(position.model_dump(mode="json", include=changed | {"asset_type", "code"}))
+    removed = [key for key in previous_positions if key not in current_key_set]
+    order_changed = list(previous_positions) != current_keys
+    totals_changed = previous.totals != current.totals
+
+    if not upserts and not changes and not removed and not order_changed and not totals_changed:
+        return None
+
+    patch: dict[str, Any] = {
+        "meta": current.meta.model_dump(mode="json"),
+        "upserts": upserts,
+        "changes": changes,
+        "removed": removed,
+    }
+    if totals_changed:
+        patch["totals"] = current.totals.model_dump(mode="json")
+    if order_changed:
+        patch["order"] = current_keys
+    return patch
+
+
+def format_sse(event: str, payload: Any) -> str:
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def stream_snapshots(
+    refresher: SnapshotRefresher, request: Request, keepalive_seconds: float = 15
+) -> AsyncIterator[str]:
+    async with refresher.subscription():
+        sequence = 0
+        previous: PortfolioSnapshot | None = None
+        while not refresher.closed and not await request.is_disconnected():
+            sequence, snapshot = await refresher.wait_for_update(sequence, keepalive_seconds)
+            if refresher.closed:
+                break
+            if snapshot is None or snapshot is previous:
+                yield ": keep-alive\n\n"
+                continue
+
+            if previous is None:
+                yield format_sse("snapshot", snapshot.model_dump(mode="json"))
+            else:
+                patch = diff_snapshots(previous, snapshot)
+                if patch:
+                    yield format_sse("patch", patch)
+            previous = snapshot
+
+
+def format_ndjson(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+async def stream_progress(
+    operation: Callable[[Callable[[dict[str, Any]], None]], Awaitable[BaseModel]],
+) -> AsyncIterator[str]:
+    progress: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+    task = asyncio.create_task(operation(progress.put_nowait))
+    try:
+        while not task.done():
+            waiter = asyncio.ensure_future(progress.get())
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if not waiter.done():
+                waiter.cancel()
+                continue
+            latest = waiter.result()
+            while not progress.empty():
+                latest = progress.get_nowait()
+            yield format_ndjson({"event": "progress", **latest})
+
+        try:
+            result = task.result()
+        except ValueError as error:
+            yield format_ndjson({"event": "error", "message": str(error)})
+            return
+        except Exception:
+            logger.exception("导入任务失败")
+            yield format_ndjson({"event": "error", "message": "导入失败，请稍后重试"})
+            return
+        yield format_ndjson({"event": "result", **result.model_dump(mode="json")})
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def stream_fund_import(service: PortfolioService, items: list[FundImportItem]) -> AsyncIterator[str]:
+    return stream_progress(
+        lambda report: service.import_fund_items(
+            items, on_progress=lambda done, total: report({"done": done, "total": total})
+        )
+    )
+
+
+def stream_statement_import(service: PortfolioService, reader: StatementReader) -> AsyncIterator[str]:
+    return stream_progress(
+        lambda report: service.import_statement(
+            reader.rows(),
+            on_progress=lambda rows, failed: report(
+                {"rows": rows, "failed": failed, "bytes": reader.bytes_read}
+            ),
+        )
+    )
+
+
+class UploadStreamingResponse(StreamingResponse):
+    async def listen_for_disconnect(self, receive: Receive) -> None:
+        await anyio.sleep_forever()
@@ -0,0 +1,135 @@
+import json
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+MARKET_TZ = timezone(timedelta(hours=8))
+
+TRADING_SESSIONS: tuple[tuple[time, time], ...] = (
+    (time(9, 30), time(11, 30)),
+    (time(13, 0), time(15, 0)),
+)
+
+A_SHARE_PREFIXES = ("sh", "sz", "bj")
+MAX_CALENDAR_SCAN_DAYS = 366
+
+
+def market_now() -> datetime:
+    return datetime.now(MARKET_TZ)
+
+
+class TradingCalendar:
+    def __init__(
+        self,
+        holidays: Iterable[date] = (),
+        sessions: tuple[tuple[time, time], ...] = TRADING_SESSIONS,
+    ) -> None:
+        self._holidays = frozenset(holidays)
+        self._sessions = sessions
+
+    @classmethod
+    def from_file(cls, path: Path) -> "TradingCalendar":
+        if not path.exists():
+            return cls()
+        with path.open("r", encoding="utf-8") as file:
+            payload = json.load(file)
+        try:
+            holidays = [date.fromisoformat(value) for value in payload.get("holidays", [])]
+        except (AttributeError, TypeError, ValueError) as error:
+            raise ValueError(f"交易日历文件格式错误: {path}") from error
+        return cls(holidays)
+
+    @property
+    def holidays(self) -> frozenset[date]:
+        return self._holidays
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self._holidays
+
+    def is_trading_time(self, moment: datetime | None = None) -> bool:
+        current = (moment or market_now()).astimezone(MARKET_TZ)
+        if not self.is_trading_day(current.date()):
+            return False
+        clock = current.time()
+        return any(start <= clock < end for start, end in self._sessions)
+
+    def next_open(self, moment: datetime | None = None) -> datetime | None:
+        current = (moment or market_now()).astimezone(MARKET_TZ)
+        for offset in range(MAX_CALENDAR_SCAN_DAYS):
+            day = current.date() + timedelta(days=offset)
+            if not self.is_trading_day(day):
+                continue
+            for start, _ in self._sessions:
+                opens_at = datetime.combine(day, start, MARKET_TZ)
+                if opens_at > current:
+                    return opens_at
+        return None
+
+    def previous_close(self, moment: datetime | None = None) -> datetime | None:
+        current = (moment or market_now()).astimezone(MARKET_TZ)
+        for offset in range(MAX_CALENDAR_SCAN_DAYS):
+            day = current.date() - timedelta(days=offset)
+            if not self.is_trading_day(day):
+                continue
+            for _, end in reversed(self._sessions):
+                closes_at = datetime.combine(day, end, MARKET_TZ)
+                if closes_at <= current:
+                    return closes_at
+        return None
+
+
+class QuoteExpiryPolicy:
+    def __init__(
+        self,
+        calendar: TradingCalendar | None = None,
+        trading_ttl_seconds: float = 8,
+        settle_seconds: float = 300,
+        close_tolerance_seconds: float = 60,
+    ) -> None:
+        self._calendar = calendar or TradingCalendar()
+        self._trading_ttl = trading_ttl_seconds
+        self._settle = timedelta(seconds=settle_seconds)
+        self._close_tolerance = timedelta(seconds=close_tolerance_seconds)
+
+    @property
+    def calendar(self) -> TradingCalendar:
+        return self._calendar
+
+    def ttl_seconds(
+        self, asset_type: str, code: str, quote_time: str | None, now: datetime | None = None
+    ) -> float:
+        if asset_type == "stock" and not code.lower().startswith(A_SHARE_PREFIXES):
+            return self._trading_ttl
+
+        current = (now or market_now()).astimezone(MARKET_TZ)
+        if self._calendar.is_trading_time(current):
+            return self._trading_ttl
+
+        next_open = self._calendar.next_open(current)
+        if next_open is None:
+            return self._trading_ttl
+
+        closed_at = self._calendar.previous_close(current)
+        if closed_at is not None and current - closed_at < self._settle:
+            quoted_at = parse_quote_time(quote_time)
+            if quoted_at is None or quoted_at < closed_at - self._close_tolerance:
+                return self._trading_ttl
+
+        return max(self._trading_ttl, (next_open - current).total_seconds())
+
+
+DEFAULT_CALENDAR = TradingCalendar()
+
+
+QUOTE_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y%m%d%H%M%S", "%Y-%m-%d")
+
+
+def parse_quote_time(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    for pattern in QUOTE_TIME_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), pattern).replace(tzinfo=MARKET_TZ)
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,159 @@
+import asyncio
+import importlib.util
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class HostPolicy:
+    max_concurrency: int = 8
+    rate_per_second: float | None = None
+    burst: int = 1
+
+
+@dataclass
+class TransportConfig:
+    max_connections: int = 64
+    max_keepalive_connections: int = 32
+    keepalive_expiry_seconds: float = 30.0
+    http2: bool = False
+    default_policy: HostPolicy = field(default_factory=HostPolicy)
+    host_policies: dict[str, HostPolicy] = field(
+        default_factory=lambda: {
+            "fundgz.1234567.com.cn": HostPolicy(max_concurrency=16, rate_per_second=20, burst=40),
+            "qt.gtimg.cn": HostPolicy(max_concurrency=4, rate_per_second=10, burst=10),
+        }
+    )
+    upstream_overrides: dict[str, str] = field(default_factory=dict)
+
+
+def parse_upstream_overrides(value: str) -> dict[str, str]:
+    overrides = {}
+    for item in value.split(","):
+        host, _, target = item.partition("=")
+        if host.strip() and target.strip():
+            overrides[host.strip()] = target.strip()
+    return overrides
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, burst: int) -> None:
+        self._rate = rate_per_second
+        self._capacity = max(1, burst)
+        self._tokens = float(self._capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class HostLimiter:
+    def __init__(self, policy: HostPolicy) -> None:
+        self._policy = policy
+        self._semaphore = asyncio.Semaphore(max(1, policy.max_concurrency))
+        self._bucket = (
+            TokenBucket(policy.rate_per_second, policy.burst) if policy.rate_per_second else None
+        )
+        self.active = 0
+        self.peak_active = 0
+        self.waiting = 0
+        self.requests = 0
+        self.queued_requests = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def __aenter__(self) -> None:
+        started_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+            try:
+                if self._bucket:
+                    await self._bucket.acquire()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started_at
+        self.requests += 1
+        if waited > 0.001:
+            self.queued_requests += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "max_concurrency": self._policy.max_concurrency,
+            "active": self.active,
+            "peak_active": self.peak_active,
+            "saturation": round(self.active / max(1, self._policy.max_concurrency), 4),
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "queued_requests": self.queued_requests,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.requests, 6) if self.requests else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+        }
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self, config: TransportConfig | None = None, inner: httpx.AsyncBaseTransport | None = None
+    ) -> None:
+        self._config = config or TransportConfig()
+        self._inner = inner or httpx.AsyncHTTPTransport(
+            http2=self._config.http2 and importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=self._config.max_connections,
+                max_keepalive_connections=self._config.max_keepalive_connections,
+                keepalive_expiry=self._config.keepalive_expiry_seconds,
+            ),
+        )
+        self._limiters: dict[str, HostLimiter] = {}
+        self._overrides = {
+            host: httpx.URL(target) for host, target in self._config.upstream_overrides.items()
+        }
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = self._limiter_for(request.url.host)
+        override = self._overrides.get(request.url.host)
+        if override is not None:
+            request.url = request.url.copy_with(
+                scheme=override.scheme, host=override.host, port=override.port
+            )
+        async with limiter:
+            response = await self._inner.handle_async_request(request)
+            await response.aread()
+            return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {host: limiter.stats() for host, limiter in self._limiters.items()}
+
+    def _limiter_for(self, host: str) -> HostLimiter:
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            policy = self._config.host_policies.get(host, self._config.default_policy)
+            limiter = HostLimiter(policy)
+            self._limiters[host] = limiter
+        return limiter
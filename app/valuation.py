@@ -0,0 +1,189 @@
+import importlib.util
+
+from app.providers import DataProviderError, RawQuote
+from app.schemas import PortfolioTotals, PositionConfig, PositionQuote
+
+np = None
+
+
+def numpy_available() -> bool:
+    return np is not None or importlib.util.find_spec("numpy") is not None
+
+
+def _load_numpy():
+    global np
+    if np is None:
+        np = importlib.import_module("numpy")
+    return np
+
+
+class VectorValuation:
+    def __init__(
+        self,
+        positions: list[PositionConfig],
+        quotes: list[RawQuote | DataProviderError | None],
+        cost_value,
+        market_value,
+        pnl_amount,
+        pnl_percent,
+        ok_mask,
+    ) -> None:
+        self._positions = positions
+        self._quotes = quotes
+        self._cost_value = cost_value
+        self._market_value = market_value
+        self._pnl_amount = pnl_amount
+        self._pnl_percent = pnl_percent
+        self._ok_mask = ok_mask
+        self._columns: tuple[list, list, list, list, list] | None = None
+        self._field_columns: dict[str, list] = {}
+
+        total_cost = round(float(cost_value.sum()), 2)
+        total_market_value = round(float(market_value[ok_mask].sum()), 2)
+        total_pnl_amount = round(total_market_value - total_cost, 2)
+        successful_positions = int(ok_mask.sum())
+        self.totals = PortfolioTotals(
+            total_cost=total_cost,
+            total_market_value=total_market_value,
+            total_pnl_amount=total_pnl_amount,
+            total_pnl_percent=round(total_pnl_amount / total_cost * 100, 2) if total_cost > 0 else 0.0,
+            successful_positions=successful_positions,
+            failed_positions=len(positions) - successful_positions,
+        )
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def rows(self, indices: list[int] | None = None) -> list[PositionQuote]:
+        selected = range(len(self._positions)) if indices is None else indices
+        return [self._build_row(index) for index in selected]
+
+    def column(self, field: str) -> list:
+        cached = self._field_columns.get(field)
+        if cached is not None:
+            return cached
+        cost_values, market_values, pnl_amounts, pnl_percents, ok_mask = self._column_lists()
+        rows = list(zip(self._positions, self._quotes, ok_mask))
+        if field == "asset_type":
+            values = [position.asset_type for position in self._positions]
+        elif field == "code":
+            values = [quote.code if ok else position.code for position, quote, ok in rows]
+        elif field == "name":
+            values = [
+                position.name or (quote.name if ok else None) or position.code for position, quote, ok in rows
+            ]
+        elif field in ("units", "cost_price"):
+            values = [getattr(position, field) for position in self._positions]
+        elif field == "cost_value":
+            values = cost_values
+        elif field == "status":
+            values = ["ok" if ok else "error" for ok in ok_mask]
+        elif field == "current_price":
+            values = [round(quote.price, 4) if ok else None for _, quote, ok in rows]
+        elif field == "change_percent":
+            values = [
+                round(quote.change_percent, 2) if ok and quote.change_percent is not None else None
+                for _, quote, ok in rows
+            ]
+        elif field in ("market_value", "pnl_amount", "pnl_percent"):
+            source = {"market_value": market_values, "pnl_amount": pnl_amounts, "pnl_percent": pnl_percents}
+            values = [value if ok else None for value, ok in zip(source[field], ok_mask)]
+        else:
+            values = [getattr(row, field) for row in self.rows()]
+        self._field_columns[field] = values
+        return values
+
+    def _column_lists(self) -> tuple[list, list, list, list, list]:
+        if self._columns is None:
+            self._columns = (
+                self._cost_value.tolist(),
+                self._market_value.tolist(),
+                self._pnl_amount.tolist(),
+                self._pnl_percent.tolist(),
+                self._ok_mask.tolist(),
+            )
+        return self._columns
+
+    def _build_row(self, index: int) -> PositionQuote:
+        cost_values, market_values, pnl_amounts, pnl_percents, ok_mask = self._column_lists()
+        position = self._positions[index]
+        raw_quote = self._quotes[index]
+        display_name = position.name or position.code
+        cost_value = cost_values[index]
+
+        if not ok_mask[index]:
+            return PositionQuote(
+                asset_type=position.asset_type,
+                code=position.code,
+                name=display_name,
+                units=position.units,
+                cost_price=position.cost_price,
+                current_price=None,
+                change_percent=None,
+                market_value=None,
+                cost_value=cost_value,
+                pnl_amount=None,
+                pnl_percent=None,
+                source=None,
+                quote_time=None,
+                stale=False,
+                status="error",
+                error=str(raw_quote) if raw_quote else "行情数据缺失",
+            )
+
+        return PositionQuote(
+            asset_type=position.asset_type,
+            code=raw_quote.code,
+            name=position.name or raw_quote.name or display_name,
+            units=position.units,
+            cost_price=position.cost_price,
+            current_price=round(raw_quote.price, 4),
+            change_percent=round(raw_quote.change_percent, 2)
+            if raw_quote.change_percent is not None
+            else None,
+            market_value=market_values[index],
+            cost_value=cost_value,
+            pnl_amount=pnl_amounts[index],
+            pnl_percent=pnl_percents[index],
+            source=raw_quote.source,
+            quote_time=raw_quote.quote_time,
+            stale=raw_quote.stale,
+            status="ok",
+            error=None,
+        )
+
+
+class VectorValuationEngine:
+    def __init__(self) -> None:
+        if not numpy_available():
+            raise RuntimeError("向量化估值需要安装 numpy")
+        _load_numpy()
+        self._version: tuple[int, int] | None = None
+        self._units = np.empty(0)
+        self._cost_value = np.empty(0)
+
+    def evaluate(
+        self,
+        config_version: int,
+        positions: list[PositionConfig],
+        quotes: list[RawQuote | DataProviderError | None],
+    ) -> VectorValuation:
+        count = len(positions)
+        version = (config_version, count)
+        if version != self._version:
+            self._units = np.fromiter((position.units for position in positions), float, count)
+            cost_prices = np.fromiter((position.cost_price for position in positions), float, count)
+            self._cost_value = np.round(self._units * cost_prices, 2)
+            self._version = version
+
+        prices = np.fromiter(
+            (quote.price if isinstance(quote, RawQuote) else np.nan for quote in quotes), float, count
+        )
+        ok_mask = ~np.isnan(prices)
+        market_value = np.round(self._units * np.nan_to_num(prices), 2)
+        pnl_amount = np.round(market_value - self._cost_value, 2)
+        safe_cost = np.where(self._cost_value > 0, self._cost_value, 1.0)
+        pnl_percent = np.where(self._cost_value > 0, np.round(pnl_amount / safe_cost * 100, 2), 0.0)
+        return VectorValuation(
+            positions, quotes, self._cost_value, market_value, pnl_amount, pnl_percent, ok_mask
+        )
@@ -0,0 +1,154 @@
+import asyncio
+import gzip
+import json
+import logging
+import time
+from pathlib import Path
+
+from app.persistence import FileStamp, write_atomic
+from app.providers import QuoteProvider, RawQuote
+from app.schemas import PortfolioSnapshot
+from app.service import PortfolioService
+
+logger = logging.getLogger(__name__)
+
+WARM_START_VERSION = 1
+
+
+class WarmStartStore:
+    def __init__(
+        self,
+        path: Path,
+        provider: QuoteProvider,
+        service: PortfolioService,
+        interval_seconds: float = 60.0,
+        snapshot_max_age_seconds: float = 900.0,
+    ) -> None:
+        self._path = path
+        self._provider = provider
+        self._service = service
+        self._interval = interval_seconds
+        self._snapshot_max_age = snapshot_max_age_seconds
+        self._task: asyncio.Task[None] | None = None
+        self._saved_signature: tuple | None = None
+        self._saves = 0
+        self._restored_quotes = 0
+        self._restored_snapshot = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "saves": self._saves,
+            "restored_quotes": self._restored_quotes,
+            "restored_snapshot": int(self._restored_snapshot),
+        }
+
+    async def restore(self) -> int:
+        try:
+            quotes, snapshot = await asyncio.to_thread(self._read)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logger.warning("预热文件读取失败，已忽略: %s", error)
+            return 0
+
+        self._restored_quotes = self._provider.restore_quotes(quotes)
+        if snapshot is not None:
+            self._service.restore_snapshot(*snapshot)
+            self._restored_snapshot = True
+        return self._restored_quotes
+
+    async def save(self) -> bool:
+        quotes = self._provider.export_quotes()
+        exported = self._service.export_snapshot()
+        signature = (
+            self._provider.stats()["upstream_fetches"],
+            len(quotes),
+            exported[1] if exported else None,
+        )
+        if signature == self._saved_signature:
+            return False
+
+        rows = [
+            [
+                *cache_key.split(":", 1),
+                quote.name,
+                quote.price,
+                quote.change_percent,
+                quote.quote_time,
+                quote.source,
+            ]
+            for cache_key, quote in quotes
+        ]
+        try:
+            await asyncio.to_thread(self._write, rows, exported)
+        except OSError as error:
+            logger.warning("预热文件写入失败: %s", error)
+            return False
+        self._saved_signature = signature
+        self._saves += 1
+        return True
+
+    def _read(self) -> tuple[list[tuple[str, RawQuote]], tuple[PortfolioSnapshot, str, FileStamp] | None]:
+        with gzip.open(self._path, "rb") as file:
+            payload = json.load(file)
+        if payload.get("version") != WARM_START_VERSION:
+            return [], None
+
+        quotes = [
+            (
+                f"{asset_type}:{code}",
+                RawQuote(
+                    code=code,
+                    name=name,
+                    price=price,
+                    change_percent=change_percent,
+                    quote_time=quote_time,
+                    source=source,
+                ),
+            )
+            for asset_type, code, name, price, change_percent, quote_time, source in payload["quotes"]
+        ]
+        snapshot = payload.get("snapshot")
+        if not snapshot or time.time() - payload["saved_at"] > self._snapshot_max_age:
+            return quotes, None
+        return quotes, (
+            PortfolioSnapshot.model_validate(snapshot["value"]),
+            snapshot["etag"],
+            tuple(snapshot["config_stamp"]),
+        )
+
+    def _write(self, rows: list[list], exported: tuple[PortfolioSnapshot, str, FileStamp] | None) -> None:
+        snapshot = None
+        if exported:
+            value, etag, config_stamp = exported
+            snapshot = {
+                "etag": etag,
+                "config_stamp": list(config_stamp),
+                "value": value.model_dump(mode="json"),
+            }
+        payload = {"version": WARM_START_VERSION, "saved_at": time.time(), "quotes": rows, "snapshot": snapshot}
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self._path, gzip.compress(body, compresslevel=5))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.save()
+            except Exception:
+                logger.exception("保存预热文件失败")
@@ -0,0 +1,87 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import legacy_parsers  # noqa: E402
+from app import parsers  # noqa: E402
+
+PAYLOAD_DIR = Path(__file__).resolve().parent / "payloads"
+
+
+def tencent_batch(records: int) -> tuple[bytes, list[str]]:
+    recorded = [line for line in (PAYLOAD_DIR / "qt_gtimg.txt").read_bytes().splitlines() if b"~" in line]
+    lines = []
+    symbols = []
+    for index in range(records):
+        template = recorded[index % len(recorded)]
+        symbol = f"sz{index:06d}".encode("ascii")
+        lines.append(b"v_" + symbol + template[template.index(b'="') :])
+        symbols.append(symbol.decode("ascii"))
+    return b"\n".join(lines) + b"\n", symbols
+
+
+def measure(operation, repeat: int, number: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            operation()
+        samples.append((time.perf_counter() - started_at) / number)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比正则/整体解码解析与字节级解析的耗时")
+    parser.add_argument("--records", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fund_payloads = [
+        line for line in (PAYLOAD_DIR / "fundgz.txt").read_bytes().splitlines() if b"{" in line
+    ]
+
+    def legacy_fund():
+        for payload in fund_payloads:
+            legacy_parsers.parse_fund_jsonp(payload)
+
+    def fast_fund():
+        for payload in fund_payloads:
+            parsers.parse_fund_jsonp(payload)
+
+    legacy_seconds = measure(legacy_fund, args.repeat, 2000) / len(fund_payloads)
+    fast_seconds = measure(fast_fund, args.repeat, 2000) / len(fund_payloads)
+    print(f"{'payload':>16} {'legacy us':>10} {'bytes us':>10} {'speedup':>8}")
+    print(
+        f"{'fund jsonp':>16} {legacy_seconds * 1e6:>10.2f} {fast_seconds * 1e6:>10.2f} "
+        f"{legacy_seconds / fast_seconds:>7.1f}x"
+    )
+
+    for records in args.records:
+        body, symbols = tencent_batch(records)
+
+        def legacy_stock():
+            payloads = legacy_parsers.index_tencent_payloads(body)
+            for symbol in symbols:
+                legacy_parsers.parse_tencent_payload(payloads[symbol])
+
+        def fast_stock():
+            payloads = parsers.index_tencent_payloads(body)
+            for symbol in symbols:
+                parsers.parse_tencent_payload(payloads[symbol])
+
+        number = max(10, 5000 // records)
+        legacy_seconds = measure(legacy_stock, args.repeat, number)
+        fast_seconds = measure(fast_stock, args.repeat, number)
+        print(
+            f"{f'tencent x{records}':>16} {legacy_seconds * 1e6:>10.2f} {fast_seconds * 1e6:>10.2f} "
+            f"{legacy_seconds / fast_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
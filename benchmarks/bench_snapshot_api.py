@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.providers import RawQuote  # noqa: E402
+
+
+def write_portfolio(path: Path, size: int) -> None:
+    positions = [
+        {
+            "asset_type": "fund",
+            "code": f"{index:06d}",
+            "name": f"基金{index:06d}",
+            "units": round(100 + index * 0.37, 4),
+            "cost_price": round(1 + index % 97 / 50, 6),
+        }
+        for index in range(size)
+    ]
+    path.write_text(json.dumps({"positions": positions}, ensure_ascii=False), encoding="utf-8")
+
+
+async def synthetic_fund_quote(code: str) -> RawQuote:
+    seed = int(code)
+    return RawQuote(
+        code=code,
+        name=f"基金{code}",
+        price=round(1 + seed % 113 / 40, 4),
+        change_percent=round(seed % 11 - 5.5, 2),
+        quote_time="2026-10-16 15:00",
+        source="synthetic",
+    )
+
+
+async def run_load(client: httpx.AsyncClient, requests: int, concurrency: int, headers: dict) -> dict:
+    latencies: list[float] = []
+    sizes: list[int] = []
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started_at = time.perf_counter()
+            response = await client.get("/api/portfolio", headers=headers)
+            latencies.append(time.perf_counter() - started_at)
+            response.raise_for_status()
+            sizes.append(len(response.content))
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    latencies.sort()
+    return {
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+        "bytes": sizes[0] if sizes else 0,
+    }
+
+
+async def bench_size(size: int, args: argparse.Namespace) -> list[dict]:
+    from app.main import app
+
+    write_portfolio(Path(os.environ["PORTFOLIO_FILE"]), size)
+    results = []
+    async with app.router.lifespan_context(app):
+        provider = app.state.portfolio_service.provider
+        provider.register_fund_source("synthetic", synthetic_fund_quote, primary=True)
+        refresher = app.state.snapshot_refresher
+        refresher.start()
+        while refresher.latest() is None:
+            await asyncio.sleep(0.05)
+
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Accept-Encoding": "gzip" if args.compress else "identity"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for mode, fast_json in (("standard", False), ("fast_json", True)):
+                app.state.fast_json = fast_json
+                await run_load(client, max(1, args.requests // 10), args.concurrency, headers)
+                result = await run_load(client, args.requests, args.concurrency, headers)
+                results.append({"positions": size, "mode": mode, **result})
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="对比 /api/portfolio 默认序列化与快速 JSON 路径的吞吐与延迟")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--compress", action="store_true", help="请求 gzip 压缩响应")
+    parser.add_argument("--json", type=Path, help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        os.environ["PORTFOLIO_FILE"] = str(workdir / "portfolio.json")
+        os.environ["QUOTE_HISTORY_DIR"] = str(workdir / "history")
+        os.environ["PORTFOLIO_DIR"] = str(workdir / "portfolios")
+        os.environ["SHARED_STATE_DIR"] = str(workdir / "shared")
+        os.environ["WARM_START_FILE"] = ""
+        write_portfolio(workdir / "portfolio.json", 0)
+
+        results = []
+        print(f"{'positions':>10} {'mode':>10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'bytes':>10}")
+        for size in args.sizes:
+            for result in await bench_size(size, args):
+                results.append(result)
+                print(
+                    f"{result['positions']:>10} {result['mode']:>10} {result['requests_per_second']:>9} "
+                    f"{result['p50_ms']:>9} {result['p99_ms']:>9} {result['bytes']:>10}"
+                )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.paging import PositionRows, page_rows  # noqa: E402
+from app.providers import DataProviderError, QuoteProvider, RawQuote  # noqa: E402
+from app.schemas import PortfolioMeta, PositionConfig  # noqa: E402
+from app.service import PortfolioService  # noqa: E402
+from app.valuation import VectorValuationEngine, numpy_available  # noqa: E402
+
+
+def build_book(size: int, error_rate: float) -> tuple[list[PositionConfig], list[RawQuote | DataProviderError]]:
+    rng = random.Random(size)
+    positions = []
+    quotes = []
+    for index in range(size):
+        code = f"{index:06d}"
+        positions.append(
+            PositionConfig(
+                asset_type="fund",
+                code=code,
+                name=f"基金{code}",
+                units=round(rng.uniform(10, 50000), 4),
+                cost_price=round(rng.uniform(0.5, 5), 6),
+            )
+        )
+        if rng.random() < error_rate:
+            quotes.append(DataProviderError("基金估值为空"))
+        else:
+            quotes.append(
+                RawQuote(
+                    code=code,
+                    name=f"基金{code}",
+                    price=round(rng.uniform(0.5, 5), 4),
+                    change_percent=round(rng.uniform(-5, 5), 2),
+                    quote_time="2026-10-16 15:00",
+                    source="eastmoney",
+                )
+            )
+    return positions, quotes
+
+
+def measure(operation, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比逐条估值与 numpy 向量化估值的耗时")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    if not numpy_available():
+        raise SystemExit("需要先安装 numpy: pip install numpy")
+
+    service = PortfolioService(Path("unused.json"), QuoteProvider())
+    meta = PortfolioMeta(base_currency="CNY", refresh_seconds=15, updated_at="2026-10-16T15:00:00")
+    print(
+        f"{'positions':>10} {'python ms':>11} {'numpy ms':>10} {'totals only':>11} {'page 100':>9} "
+        f"{'speedup':>8}  totals match"
+    )
+    for size in args.sizes:
+        positions, quotes = build_book(size, args.error_rate)
+
+        def python_path():
+            rows = [service._evaluate_position(position, quote) for position, quote in zip(positions, quotes)]
+            return service._compute_totals(rows)
+
+        engine = VectorValuationEngine()
+
+        def numpy_path():
+            valuation = engine.evaluate(0, positions, quotes)
+            valuation.rows()
+            return valuation.totals
+
+        def numpy_totals_only():
+            return engine.evaluate(0, positions, quotes).totals
+
+        def numpy_page():
+            valuation = engine.evaluate(0, positions, quotes)
+            rows = PositionRows(meta, valuation.totals, len(valuation), valuation.column, valuation.rows)
+            return page_rows(rows, sort="-pnl_percent", limit=100)
+
+        python_seconds = measure(python_path, args.repeat)
+        numpy_seconds = measure(numpy_path, args.repeat)
+        totals_seconds = measure(numpy_totals_only, args.repeat)
+        page_seconds = measure(numpy_page, args.repeat)
+        matches = python_path() == numpy_path()
+        print(
+            f"{size:>10} {python_seconds * 1000:>11.2f} {numpy_seconds * 1000:>10.2f} "
+            f"{totals_seconds * 1000:>11.2f} {page_seconds * 1000:>9.2f} "
+            f"{python_seconds / numpy_seconds:>7.1f}x  {matches}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import legacy_parsers  # noqa: E402
+from app import parsers  # noqa: E402
+from app.parsers import PayloadFormatError  # noqa: E402
+
+PAYLOAD_DIR = Path(__file__).resolve().parent / "payloads"
+NAME_CHARS = "招商中证白酒指数易方达消费行业股票ABC混合(LOF)-\"\\ "
+NOISE = [b'"', b"~", b")", b"(", b"=", b"{", b"}", b",", b"\\", b"\n", b"v_", b"\xff", b"\x81"]
+
+
+def recorded_fund_payloads() -> list[bytes]:
+    return (PAYLOAD_DIR / "fundgz.txt").read_bytes().splitlines()
+
+
+def recorded_tencent_records() -> list[bytes]:
+    return (PAYLOAD_DIR / "qt_gtimg.txt").read_bytes().splitlines()
+
+
+def random_number(rng: random.Random) -> str:
+    return rng.choice(["", "0", "-0.00", f"{rng.uniform(-50, 5000):.{rng.randint(0, 4)}f}", "abc", "1e3"])
+
+
+def rewrite_fund(rng: random.Random, payload: bytes) -> bytes:
+    start = payload.find(b"{")
+    if start < 0:
+        return payload
+    document = json.loads(payload[start : payload.rfind(b"}") + 1])
+    document["name"] = "".join(rng.choice(NAME_CHARS) for _ in range(rng.randint(0, 12)))
+    document["gsz"] = random_number(rng)
+    document["gszzl"] = random_number(rng)
+    document["gztime"] = rng.choice(["", "2026-10-16 15:00", "2026-10-16 09:31"])
+    separators = rng.choice([(",", ":"), (", ", ": ")])
+    text = json.dumps(document, ensure_ascii=rng.random() < 0.3, separators=separators)
+    suffix = rng.choice([";", "", ";\n"])
+    return f"jsonpgz({text}){suffix}".encode("utf-8")
+
+
+def rewrite_tencent(rng: random.Random, record: bytes) -> bytes:
+    start = record.find(b'="')
+    if start < 0 or b"~" not in record:
+        return record
+    fields = record[start + 2 : record.rfind(b'"')].split(b"~")
+    name = "".join(rng.choice(NAME_CHARS.replace('"', "")) for _ in range(rng.randint(0, 6)))
+    fields[1] = name.encode("gbk")
+    fields[3] = random_number(rng).encode("ascii")
+    fields[4] = random_number(rng).encode("ascii")
+    if rng.random() < 0.2:
+        fields = fields[: rng.randint(5, len(fields))]
+    return record[: start + 2] + b"~".join(fields) + b'";'
+
+
+def mutate(rng: random.Random, payload: bytes) -> bytes:
+    data = bytearray(payload)
+    for _ in range(rng.randint(1, 4)):
+        operation = rng.random()
+        position = rng.randint(0, len(data)) if data else 0
+        if operation < 0.3 and data:
+            del data[position : position + rng.randint(1, 8)]
+        elif operation < 0.6:
+            data[position:position] = rng.choice(NOISE)
+        elif operation < 0.8 and data:
+            data[min(position, len(data) - 1)] = rng.randrange(256)
+        else:
+            data = data[:position]
+    return bytes(data)
+
+
+def legacy_or_error(operation, payload):
+    try:
+        quote = operation(payload)
+    except (PayloadFormatError, ValueError, UnicodeDecodeError):
+        return "error"
+    return quote.name, quote.price, quote.change_percent, quote.quote_time
+
+
+def check_equivalence(rng: random.Random, iterations: int) -> int:
+    failures = 0
+    funds = recorded_fund_payloads()
+    records = recorded_tencent_records()
+    for _ in range(iterations):
+        fund = rewrite_fund(rng, rng.choice(funds))
+        expected = legacy_or_error(legacy_parsers.parse_fund_jsonp, fund)
+        actual = legacy_or_error(parsers.parse_fund_jsonp, fund)
+        if expected != actual:
+            failures += 1
+            print(f"fund mismatch: {fund!r}\n  legacy={expected}\n  bytes={actual}")
+
+        batch = [rewrite_tencent(rng, rng.choice(records)) for _ in range(rng.randint(1, 20))]
+        body = rng.choice([b"\n", b"\r\n", b""]).join(batch)
+        legacy_index = legacy_parsers.index_tencent_payloads(body)
+        fast_index = parsers.index_tencent_payloads(body)
+        if set(legacy_index) != set(fast_index):
+            failures += 1
+            print(f"tencent index mismatch: {sorted(legacy_index)} != {sorted(fast_index)}")
+            continue
+        for symbol, payload in legacy_index.items():
+            expected = legacy_or_error(legacy_parsers.parse_tencent_payload, payload)
+            actual = legacy_or_error(parsers.parse_tencent_payload, fast_index[symbol])
+            if expected != actual:
+                failures += 1
+                print(f"tencent mismatch {symbol}: {payload!r}\n  legacy={expected}\n  bytes={actual}")
+    return failures
+
+
+def check_robustness(rng: random.Random, iterations: int) -> int:
+    failures = 0
+    funds = recorded_fund_payloads()
+    tencent_body = b"\n".join(recorded_tencent_records())
+    for _ in range(iterations):
+        fund = mutate(rng, rng.choice(funds))
+        body = mutate(rng, tencent_body)
+        try:
+            try:
+                parsers.parse_fund_jsonp(fund)
+            except PayloadFormatError:
+                pass
+            for payload in parsers.index_tencent_payloads(body).values():
+                try:
+                    parsers.parse_tencent_payload(payload).name
+                except PayloadFormatError:
+                    pass
+        except Exception as error:
+            failures += 1
+            print(f"unexpected {type(error).__name__}: {error}\n  fund={fund!r}\n  body={body!r}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="基于录制报文的解析器模糊测试")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2**32)
+    rng = random.Random(seed)
+    failures = check_equivalence(rng, args.iterations) + check_robustness(rng, args.iterations)
+    print(f"seed={seed} iterations={args.iterations} failures={failures}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import json
+import re
+
+from app.parsers import ParsedQuote, PayloadFormatError
+
+
+def as_float(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_fund_jsonp(body: bytes) -> ParsedQuote:
+    match = re.search(r"jsonpgz\((.*?)\);?$", body.decode("utf-8").strip())
+    if not match or not match.group(1):
+        raise PayloadFormatError("基金接口返回格式异常")
+    payload = json.loads(match.group(1))
+    return ParsedQuote(
+        raw_name=payload.get("name") or None,
+        price=as_float(payload.get("gsz")),
+        change_percent=as_float(payload.get("gszzl")),
+        quote_time=payload.get("gztime") or None,
+    )
+
+
+def index_tencent_payloads(body: bytes) -> dict[str, str]:
+    text = body.decode("gbk", errors="ignore")
+    return {match.group(1).lower(): match.group(2) for match in re.finditer(r'v_([^=\s]+)="([^"]*)"', text)}
+
+
+def parse_tencent_payload(payload: str) -> ParsedQuote:
+    parts = payload.split("~")
+    if len(parts) < 5:
+        raise PayloadFormatError("股票接口返回字段不足")
+    current_price = as_float(parts[3])
+    prev_close = as_float(parts[4])
+    change_percent = None
+    if current_price is not None and prev_close and prev_close > 0:
+        change_percent = (current_price - prev_close) / prev_close * 100
+    return ParsedQuote(
+        raw_name=parts[1] or None,
+        price=current_price,
+        change_percent=change_percent,
+        quote_time=parts[30] if len(parts) > 30 and parts[30] else None,
+    )
@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+MOCK_SERVER = Path(__file__).resolve().parent / "mock_upstream.py"
+UPSTREAM_HOSTS = ("fundgz.1234567.com.cn", "qt.gtimg.cn", "hq.sinajs.cn")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def process_memory_mb(pid: int) -> dict[str, float | None]:
+    status = Path(f"/proc/{pid}/status")
+    if not status.exists():
+        return {"rss_mb": None, "peak_rss_mb": None}
+    values = {}
+    for line in status.read_text().splitlines():
+        key, _, value = line.partition(":")
+        if key in ("VmRSS", "VmHWM"):
+            values[key] = round(int(value.split()[0]) / 1024, 1)
+    return {"rss_mb": values.get("VmRSS"), "peak_rss_mb": values.get("VmHWM")}
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_portfolio(path: Path, size: int, stock_ratio: float) -> None:
+    stock_every = round(1 / stock_ratio) if stock_ratio > 0 else 0
+    positions = []
+    for index in range(size):
+        if stock_every and index % stock_every == 0:
+            positions.append(
+                {"asset_type": "stock", "code": f"sz{index:06d}", "units": 100, "cost_price": 10.5}
+            )
+        else:
+            positions.append(
+                {"asset_type": "fund", "code": f"{index:06d}", "units": 1000 + index, "cost_price": 1.2}
+            )
+    path.write_text(json.dumps({"positions": positions}), encoding="utf-8")
+
+
+async def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"进程提前退出：{url}")
+            try:
+                await client.get(url, timeout=1)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"等待服务就绪超时：{url}")
+
+
+async def drive(client: httpx.AsyncClient, request_factory, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    failures = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(worker_id: int) -> None:
+        nonlocal failures
+        for sequence in itertools.count():
+            if time.monotonic() >= deadline:
+                break
+            method, url, body = request_factory(worker_id, sequence)
+            started_at = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                if response.status_code >= 400:
+                    failures += 1
+            except httpx.HTTPError:
+                failures += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    return {
+        "requests": len(latencies),
+        "failures": failures,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def portfolio_requests(worker_id: int, sequence: int):
+    return "GET", "/api/portfolio", None
+
+
+def import_requests(batch_size: int):
+    def factory(worker_id: int, sequence: int):
+        items = [
+            {"code": f"{1 + worker_id}{(sequence * batch_size + offset) % 100000:05d}", "amount": 1000}
+            for offset in range(batch_size)
+        ]
+        return "POST", "/api/portfolio/import-funds", {"items": items}
+
+    return factory
+
+
+def mutation_requests(worker_id: int, sequence: int):
+    code = f"sh9{worker_id:02d}{sequence // 3 % 1000:03d}"
+    step = sequence % 3
+    if step == 0:
+        body = {"asset_type": "stock", "code": code, "name": code, "units": 100, "cost_price": 10}
+        return "POST", "/api/positions", body
+    if step == 1:
+        return "PATCH", f"/api/positions/stock/{code}", {"units": 200}
+    return "DELETE", f"/api/positions/stock/{code}", None
+
+
+async def run_size(size: int, args: argparse.Namespace, mock_url: str, workdir: Path) -> list[dict]:
+    config_path = workdir / f"portfolio-{size}.json"
+    write_portfolio(config_path, size, args.stock_ratio)
+    port = free_port()
+    env = {
+        **os.environ,
+        "PORTFOLIO_FILE": str(config_path),
+        "QUOTE_HISTORY_DIR": str(workdir / f"history-{size}"),
+        "PORTFOLIO_DIR": str(workdir / f"portfolios-{size}"),
+        "SHARED_STATE_DIR": str(workdir / f"shared-{size}"),
+        "WARM_START_FILE": "",
+        "QUOTE_UPSTREAM_OVERRIDES": ",".join(f"{host}={mock_url}" for host in UPSTREAM_HOSTS),
+    }
+    env.update(dict(item.split("=", 1) for item in args.env))
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    results = []
+    try:
+        await wait_until_ready(f"{base_url}/health", app)
+        scenarios = {
+            "portfolio": portfolio_requests,
+            "import": import_requests(args.import_batch),
+            "mutations": mutation_requests,
+        }
+        timeout = httpx.Timeout(args.request_timeout)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+            async with httpx.AsyncClient(base_url=mock_url) as mock:
+                await mock.get("/_reset")
+                started_at = time.perf_counter()
+                cold = await client.get("/api/portfolio")
+                cold_ms = round((time.perf_counter() - started_at) * 1000, 2)
+                cold_upstream = (await mock.get("/_stats")).json()
+                results.append(
+                    {
+                        "size": size,
+                        "scenario": "cold_snapshot",
+                        "requests": 1,
+                        "failures": int(cold.status_code >= 400),
+                        "p50_ms": cold_ms,
+                        "p95_ms": cold_ms,
+                        "p99_ms": cold_ms,
+                        "upstream": cold_upstream,
+                        **process_memory_mb(app.pid),
+                    }
+                )
+
+                for name in args.scenarios:
+                    await mock.get("/_reset")
+                    outcome = await drive(client, scenarios[name], args.concurrency, args.duration)
+                    upstream = (await mock.get("/_stats")).json()
+                    results.append(
+                        {
+                            "size": size,
+                            "scenario": name,
+                            **outcome,
+                            "upstream": upstream,
+                            **process_memory_mb(app.pid),
+                        }
+                    )
+    finally:
+        app.terminate()
+        try:
+            app.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            app.kill()
+    return results
+
+
+def print_results(results: list[dict], baseline: dict[tuple[int, str], dict]) -> None:
+    print(
+        f"{'size':>7} {'scenario':>14} {'req':>7} {'fail':>5} {'rps':>9} {'p50':>9} {'p95':>9} "
+        f"{'p99':>9} {'upstream':>9} {'rss MB':>8}"
+    )
+    for result in results:
+        upstream_requests = sum(item["requests"] for item in result["upstream"].values())
+        line = (
+            f"{result['size']:>7} {result['scenario']:>14} {result['requests']:>7} {result['failures']:>5} "
+            f"{result.get('throughput_rps', '-'):>9} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+            f"{result['p99_ms']:>9} {upstream_requests:>9} {result['rss_mb'] or '-':>8}"
+        )
+        previous = baseline.get((result["size"], result["scenario"]))
+        if previous:
+            deltas = []
+            for key in ("throughput_rps", "p99_ms"):
+                if previous.get(key) and result.get(key) is not None:
+                    deltas.append(f"{key} {(result[key] - previous[key]) / previous[key] * 100:+.1f}%")
+            line += "  vs baseline: " + ", ".join(deltas)
+        print(line)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="基于本地模拟上游的接口压测")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 50000])
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=["portfolio", "import", "mutations"],
+        default=["portfolio", "import", "mutations"],
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="每个场景的压测秒数")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--import-batch", type=int, default=20)
+    parser.add_argument("--stock-ratio", type=float, default=0.2)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--env", action="append", default=[], help="传给被测服务的环境变量，如 FAST_JSON=1")
+    parser.add_argument("--output", type=Path, default=None, help="结果 JSON 路径")
+    parser.add_argument("--baseline", type=Path, default=None, help="用于对比的历史结果 JSON")
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock_command = [
+        sys.executable,
+        str(MOCK_SERVER),
+        "--port",
+        str(mock_port),
+        "--latency-ms",
+        str(args.latency_ms),
+        "--jitter-ms",
+        str(args.jitter_ms),
+        "--error-rate",
+        str(args.error_rate),
+    ]
+    if args.rate_limit:
+        mock_command += ["--rate-limit", str(args.rate_limit)]
+    mock = subprocess.Popen(mock_command)
+    mock_url = f"http://127.0.0.1:{mock_port}"
+
+    results: list[dict] = []
+    try:
+        await wait_until_ready(f"{mock_url}/_stats", mock)
+        with tempfile.TemporaryDirectory() as tmp:
+            for size in args.sizes:
+                results.extend(await run_size(size, args, mock_url, Path(tmp)))
+    finally:
+        mock.terminate()
+        mock.wait(timeout=15)
+
+    baseline = {}
+    if args.baseline:
+        previous = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline = {(item["size"], item["scenario"]): item for item in previous["results"]}
+    print_results(results, baseline)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        },
+        "results": results,
+    }
+    output = args.output or ROOT / "benchmarks" / "results" / f"load-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"结果已写入 {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,173 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from urllib.parse import unquote
+
+import uvicorn
+
+
+@dataclass
+class UpstreamProfile:
+    latency_ms: float = 30.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    rate_limit: float | None = None
+    burst: int = 20
+
+
+@dataclass
+class UpstreamCounters:
+    requests: int = 0
+    codes: int = 0
+    errors: int = 0
+    throttled: int = 0
+    tokens: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class MockUpstream:
+    def __init__(self, profile: UpstreamProfile, seed: int = 7) -> None:
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.counters: dict[str, UpstreamCounters] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        path = unquote(scope["path"])
+        if path == "/_stats":
+            await self._respond(send, 200, json.dumps(self.stats()).encode("utf-8"), "application/json")
+            return
+        if path == "/_reset":
+            self.counters.clear()
+            await self._respond(send, 200, b"{}", "application/json")
+            return
+
+        if path.startswith("/js/"):
+            upstream, codes = "fundgz", [path[4:].removesuffix(".js")]
+        elif path.startswith("/q="):
+            upstream, codes = "qt_gtimg", [code for code in path[3:].split(",") if code]
+        elif path.startswith("/list="):
+            upstream, codes = "sina", [code for code in path[6:].split(",") if code]
+        else:
+            await self._respond(send, 404, b"not found")
+            return
+
+        counters = self.counters.setdefault(upstream, UpstreamCounters(tokens=self.profile.burst))
+        counters.requests += 1
+        counters.codes += len(codes)
+        if not self._take_token(counters):
+            counters.throttled += 1
+            await self._respond(send, 429, b"too many requests")
+            return
+
+        profile = self.profile
+        delay = max(0.0, profile.latency_ms + self.rng.uniform(-profile.jitter_ms, profile.jitter_ms))
+        await asyncio.sleep(delay / 1000)
+        if upstream == "sina" or self.rng.random() < profile.error_rate:
+            counters.errors += 1
+            await self._respond(send, 503, b"service unavailable")
+            return
+
+        if upstream == "fundgz":
+            body = self._fund_payload(codes[0]).encode("utf-8")
+        else:
+            body = "\n".join(self._stock_payload(code) for code in codes).encode("gbk")
+        await self._respond(send, 200, body, "application/javascript; charset=utf-8")
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {
+                "requests": counters.requests,
+                "codes": counters.codes,
+                "errors": counters.errors,
+                "throttled": counters.throttled,
+            }
+            for name, counters in self.counters.items()
+        }
+
+    def _take_token(self, counters: UpstreamCounters) -> bool:
+        rate = self.profile.rate_limit
+        if not rate:
+            return True
+        now = time.monotonic()
+        counters.tokens = min(self.profile.burst, counters.tokens + (now - counters.updated_at) * rate)
+        counters.updated_at = now
+        if counters.tokens < 1:
+            return False
+        counters.tokens -= 1
+        return True
+
+    def _fund_payload(self, code: str) -> str:
+        seed = sum(ord(char) for char in code)
+        document = {
+            "fundcode": code,
+            "name": f"模拟基金{code}",
+            "jzrq": "2026-10-15",
+            "dwjz": f"{1 + seed % 300 / 100:.4f}",
+            "gsz": f"{1 + seed % 300 / 100 + self.rng.uniform(-0.02, 0.02):.4f}",
+            "gszzl": f"{self.rng.uniform(-3, 3):.2f}",
+            "gztime": time.strftime("%Y-%m-%d %H:%M"),
+        }
+        return f"jsonpgz({json.dumps(document, ensure_ascii=False)});"
+
+    def _stock_payload(self, symbol: str) -> str:
+        seed = sum(ord(char) for char in symbol)
+        prev_close = 5 + seed % 500
+        price = prev_close * (1 + self.rng.uniform(-0.03, 0.03))
+        fields = ["1", f"模拟{symbol}", symbol[2:], f"{price:.2f}", f"{prev_close:.2f}"]
+        fields += ["0"] * 25 + [time.strftime("%Y%m%d%H%M%S")] + ["0"] * 57
+        return f'v_{symbol}="{"~".join(fields)}";'
+
+    async def _respond(
+        self, send, status: int, body: bytes, content_type: str = "text/plain; charset=utf-8"
+    ) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", content_type.encode("ascii")),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="模拟 fundgz / qt.gtimg 行情接口的本地服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="每个上游每秒允许的请求数")
+    parser.add_argument("--burst", type=int, default=20)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    profile = UpstreamProfile(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+    )
+    uvicorn.run(MockUpstream(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,10 @@ const elements = {
   totalPnl: document.getElementById("total-pnl"),
   quoteStatus: document.getElementById("quote-status"),
   updatedAt: document.getElementById("updated-at"),
+  tableWrap: document.querySelector(".table-wrap"),
   positionsBody: document.getElementById("positions-body"),
+  topSpacer: document.querySelector("#positions-top-spacer td"),
+  bottomSpacer: document.querySelector("#positions-bottom-spacer td"),
   errorMessage: document.getElementById("error-message"),
   refreshSeconds: document.getElementById("refresh-seconds"),
   baseCurrency: document.getElementById("base-currency"),
@@ -37,6 +40,40 @@ const priceFormatter = new Intl.NumberFormat("zh-CN", {
   maximumFractionDigits: 4,
 });
 
+const tableState = {
+  positions: new Map(),
+  order: [],
+  rows: new Map(),
+};
+
+const PAGE_SIZE = 100;
+const VIRTUAL_THRESHOLD = 500;
+const ROW_HEIGHT = 49;
+const OVERSCAN_ROWS = 10;
+const PAGE_FIELDS = [
+  "name",
+  "units",
+  "cost_price",
+  "current_price",
+  "change_percent",
+  "cost_value",
+  "market_value",
+  "pnl_amount",
+  "pnl_percent",
+  "status",
+  "stale",
+].join(",");
+
+const pageState = {
+  enabled: false,
+  matched: 0,
+  currency: config.baseCurrency,
+  cursors: [null],
+  pages: new Map(),
+  expired: new Set(),
+  pending: new Map(),
+};
+
 const editState = {
   isEditing: false,
   assetType: "",
@@ -138,7 +175,7 @@ const renderRow = (position, currency) => {
   const row = document.createElement("tr");
   const pnlClass = trendClass(position.pnl_amount);
   const changeClass = trendClass(position.change_percent);
-  const statusText = position.status === "ok" ? "正常" : "异常";
+  const statusText = position.status === "ok" ? (position.stale ? "延迟" : "正常") : "异常";
   const statusClass = position.status === "ok" ? "" : "error-tag";
   const quotedName = escapeHtml(position.name);
   const quotedCode = escapeHtml(position.code);
@@ -167,30 +204,210 @@ const renderRow = (position, currency) => {
   return row;
 };
 
+const positionKey = (position) => `${position.asset_type}:${position.code}`;
+
 const renderPositions = (positions, currency) => {
-  elements.positionsBody.innerHTML = "";
-  positions.forEach((position) => {
-    elements.positionsBody.appendChild(renderRow(position, currency));
+  const nextRows = new Map();
+  positions.forEach((position, index) => {
+    const key = positionKey(position);
+    const signature = `${currency}|${JSON.stringify(position)}`;
+    let cached = tableState.rows.get(key);
+    if (!cached || cached.signature !== signature) {
+      const row = renderRow(position, currency);
+      if (cached) {
+        cached.row.replaceWith(row);
+      }
+      cached = { row, signature };
+    }
+    nextRows.set(key, cached);
+    if (elements.positionsBody.children[index] !== cached.row) {
+      elements.positionsBody.insertBefore(cached.row, elements.positionsBody.children[index] || null);
+    }
+  });
+  tableState.rows.forEach((cached, key) => {
+    if (!nextRows.has(key)) {
+      cached.row.remove();
+    }
   });
+  tableState.rows = nextRows;
 };
 
-const fetchSnapshot = async () => {
-  const response = await fetch("/api/portfolio", { cache: "no-store" });
+const etags = new Map();
+
+const fetchConditional = async (url, revalidate = true) => {
+  const etag = revalidate ? etags.get(url) : undefined;
+  const response = await fetch(url, {
+    cache: "no-store",
+    headers: etag ? { "If-None-Match": etag } : {},
+  });
+  if (response.status === 304) {
+    return null;
+  }
   if (!response.ok) {
     throw new Error(`接口请求失败: ${response.status}`);
   }
-  return response.json();
+  const body = await response.json();
+  const nextEtag = response.headers.get("ETag");
+  if (nextEtag) {
+    etags.set(url, nextEtag);
+  } else {
+    etags.delete(url);
+  }
+  return body;
+};
+
+const fetchSnapshot = () => fetchConditional("/api/portfolio");
+
+const fetchPage = async (pageIndex) => {
+  const params = new URLSearchParams({ limit: String(PAGE_SIZE), fields: PAGE_FIELDS });
+  const cursor = pageState.cursors[pageIndex];
+  if (cursor) {
+    params.set("cursor", cursor);
+  }
+  const page = await fetchConditional(`/api/portfolio/positions?${params}`, pageState.pages.has(pageIndex));
+  if (!page) {
+    return null;
+  }
+  pageState.currency = renderMeta(page.meta);
+  pageState.matched = page.matched;
+  pageState.pages.set(pageIndex, page.positions);
+  pageState.cursors[pageIndex + 1] = page.next_cursor;
+  renderTotals(page.totals, pageState.currency);
+  return page;
+};
+
+const ensurePage = (pageIndex) => {
+  if (pageState.pages.has(pageIndex) && !pageState.expired.has(pageIndex)) {
+    return Promise.resolve();
+  }
+  if (!pageState.pending.has(pageIndex)) {
+    const load = (async () => {
+      if (pageIndex > 0 && pageState.cursors[pageIndex] === undefined) {
+        await ensurePage(pageIndex - 1);
+      }
+      if (pageIndex === 0 || pageState.cursors[pageIndex]) {
+        await fetchPage(pageIndex);
+      }
+      pageState.expired.delete(pageIndex);
+    })().finally(() => pageState.pending.delete(pageIndex));
+    pageState.pending.set(pageIndex, load);
+  }
+  return pageState.pending.get(pageIndex);
+};
+
+const renderWindow = () => {
+  const { scrollTop, clientHeight } = elements.tableWrap;
+  const first = Math.max(0, Math.floor(scrollTop / ROW_HEIGHT) - OVERSCAN_ROWS);
+  const last = Math.min(pageState.matched, Math.ceil((scrollTop + clientHeight) / ROW_HEIGHT) + OVERSCAN_ROWS);
+  const visible = [];
+  const missingPages = new Set();
+  for (let index = first; index < last; index += 1) {
+    const pageIndex = Math.floor(index / PAGE_SIZE);
+    const position = pageState.pages.get(pageIndex)?.[index % PAGE_SIZE];
+    if (position) {
+      visible.push(position);
+    } else {
+      missingPages.add(pageIndex);
+    }
+  }
+
+  elements.topSpacer.style.height = `${first * ROW_HEIGHT}px`;
+  elements.bottomSpacer.style.height = `${Math.max(0, pageState.matched - first - visible.length) * ROW_HEIGHT}px`;
+  renderPositions(visible, pageState.currency);
+
+  missingPages.forEach((pageIndex) => {
+    ensurePage(pageIndex)
+      .then(renderWindow)
+      .catch((error) => setError(`拉取数据失败：${error.message}`));
+  });
+};
+
+const visiblePageRange = () => {
+  const { scrollTop, clientHeight } = elements.tableWrap;
+  const first = Math.floor(scrollTop / ROW_HEIGHT / PAGE_SIZE);
+  const last = Math.floor((scrollTop + clientHeight) / ROW_HEIGHT / PAGE_SIZE);
+  return [first, last];
+};
+
+const refreshPages = async () => {
+  const [first, last] = visiblePageRange();
+  [...pageState.pages.keys()].forEach((pageIndex) => {
+    if (pageIndex > 0 && (pageIndex < first || pageIndex > last)) {
+      pageState.pages.delete(pageIndex);
+    }
+  });
+  pageState.expired = new Set(pageState.pages.keys());
+  try {
+    await ensurePage(0);
+    for (let pageIndex = Math.max(first, 1); pageIndex <= last; pageIndex += 1) {
+      await ensurePage(pageIndex);
+    }
+    renderWindow();
+    setError("");
+  } catch (error) {
+    setError(`拉取数据失败：${error.message}`);
+  }
+};
+
+const findPosition = (assetType, code) => {
+  const key = `${assetType}:${code}`;
+  if (!pageState.enabled) {
+    return tableState.positions.get(key);
+  }
+  for (const positions of pageState.pages.values()) {
+    const target = positions.find((item) => positionKey(item) === key);
+    if (target) {
+      return target;
+    }
+  }
+  return undefined;
+};
+
+const renderMeta = (meta) => {
+  const currency = meta.base_currency || config.baseCurrency;
+  elements.updatedAt.textContent = meta.updated_at || "--";
+  elements.refreshSeconds.textContent = meta.refresh_seconds;
+  elements.baseCurrency.textContent = currency;
+  return currency;
+};
+
+const applySnapshot = (snapshot) => {
+  const currency = renderMeta(snapshot.meta);
+  tableState.positions = new Map(snapshot.positions.map((position) => [positionKey(position), position]));
+  tableState.order = snapshot.positions.map(positionKey);
+  renderTotals(snapshot.totals, currency);
+  renderPositions(snapshot.positions, currency);
+};
+
+const applyPatch = (patch) => {
+  const currency = renderMeta(patch.meta);
+  patch.removed.forEach((key) => tableState.positions.delete(key));
+  patch.upserts.forEach((position) => tableState.positions.set(positionKey(position), position));
+  patch.changes.forEach((change) => {
+    const key = positionKey(change);
+    tableState.positions.set(key, { ...tableState.positions.get(key), ...change });
+  });
+  if (patch.order) {
+    tableState.order = patch.order;
+  }
+  if (patch.totals) {
+    renderTotals(patch.totals, currency);
+  }
+  renderPositions(
+    tableState.order.map((key) => tableState.positions.get(key)).filter(Boolean),
+    currency
+  );
 };
 
 const refresh = async () => {
+  if (pageState.enabled) {
+    return refreshPages();
+  }
   try {
     const snapshot = await fetchSnapshot();
-    const currency = snapshot.meta.base_currency || config.baseCurrency;
-    elements.updatedAt.textContent = snapshot.meta.updated_at || "--";
-    elements.refreshSeconds.textContent = snapshot.meta.refresh_seconds;
-    elements.baseCurrency.textContent = currency;
-    renderTotals(snapshot.totals, currency);
-    renderPositions(snapshot.positions, currency);
+    if (snapshot) {
+      applySnapshot(snapshot);
+    }
     setError("");
     return snapshot;
   } catch (error) {
@@ -343,10 +560,7 @@ const handleTableAction = async (event) => {
   }
 
   if (action === "edit") {
-    const snapshot = await fetchSnapshot();
-    const target = snapshot?.positions?.find(
-      (item) => item.asset_type === assetType && item.code === code
-    );
+    const target = findPosition(assetType, code);
     if (!target) {
       setPositionMessage("未找到可编辑的持仓记录。", true);
       return;
@@ -387,5 +601,57 @@ elements.positionCancel.addEventListener("click", () => {
 });
 elements.positionsBody.addEventListener("click", handleTableAction);
 
-refresh();
-setInterval(refresh, Math.max(Number(config.refreshSeconds) || 15, 5) * 1000);
+const startPolling = () => {
+  refresh();
+  setInterval(refresh, Math.max(Number(config.refreshSeconds) || 15, 5) * 1000);
+};
+
+const startStream = () => {
+  if (!window.EventSource) {
+    startPolling();
+    return;
+  }
+
+  const source = new EventSource("/api/portfolio/stream");
+  source.addEventListener("snapshot", (event) => {
+    applySnapshot(JSON.parse(event.data));
+    setError("");
+  });
+  source.addEventListener("patch", (event) => {
+    applyPatch(JSON.parse(event.data));
+    setError("");
+  });
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      startPolling();
+    }
+  };
+};
+
+const startVirtualTable = () => {
+  pageState.enabled = true;
+  elements.tableWrap.classList.add("virtual");
+  elements.tableWrap.addEventListener("scroll", () => window.requestAnimationFrame(renderWindow), {
+    passive: true,
+  });
+  renderWindow();
+  setInterval(refreshPages, Math.max(Number(config.refreshSeconds) || 15, 5) * 1000);
+};
+
+const start = async () => {
+  try {
+    await ensurePage(0);
+  } catch (error) {
+    setError(`拉取数据失败：${error.message}`);
+    startPolling();
+    return;
+  }
+  if (pageState.matched > VIRTUAL_THRESHOLD) {
+    startVirtualTable();
+    return;
+  }
+  pageState.pages.clear();
+  startStream();
+};
+
+start();